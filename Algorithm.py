@@ -1,8 +1,18 @@
 import json
 from datetime import datetime
-from collections import defaultdict
+from collections import defaultdict, deque
+import bisect
+import heapq
+import itertools
 import os
+import sys
+import time
 import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from SessionModel import (DAYS_OF_WEEK, DAY_INDEX, convert_time_to_minutes, session_day_mask,
+                          session_occupancy_mask, sessions_from_course_data, load_course_sessions,
+                          load_catalog, collapse_equivalent_sessions)
 
 def ensure_directories():
     """Create necessary directories if they don't exist"""
@@ -65,7 +75,8 @@ class TimePreference:
 def validate_schedule_possibility(course_data, time_preferences=None):
     """
     Validate that at least one section of each required component (LEC, LAB, TUT) 
-    is available within the time preferences for each course.
+    is available within the time preferences for each course, and that the
+    components don't conflict with each other (see find_conflicting_components).
     Returns (is_valid, error_list)
     """
     error_list = []  # Changed from error_messages
@@ -92,13 +103,31 @@ def validate_schedule_possibility(course_data, time_preferences=None):
                 "message": f"Course {course_code} has no available {', '.join(missing_types)} sections within the specified time preferences."
             })
     
+    # Every course can be filled on its own; check whether they fit together
+    if not error_list:
+        slots = build_search_slots(course_data, time_preferences, heuristic='input')
+        conflict = find_conflicting_components(slots) if slots else []
+        if conflict:
+            courses = list(dict.fromkeys(course_code for course_code, _ in conflict))
+            components = ', '.join(f"{course_code} {session_type}" for course_code, session_type in conflict)
+            error_list.append({
+                "course": ', '.join(courses),
+                "conflicting_components": [
+                    {"course": course_code, "type": session_type}
+                    for course_code, session_type in conflict
+                ],
+                "message": f"No combination of {components} sections avoids a time conflict "
+                           f"within the specified time preferences."
+            })
+    
     is_valid = len(error_list) == 0
     return is_valid, error_list  # Now returns list instead of string
 
-def log_validity_errors(errors):
+def log_validity_errors(errors, validation_dir="validation"):
     """Log validation errors to validity.json"""
     ensure_directories()
-    validity_path = os.path.join("validation", "validity.json")
+    os.makedirs(validation_dir, exist_ok=True)
+    validity_path = os.path.join(validation_dir, "validity.json")
     
     error_data = {
         "validation_errors": errors  # Directly use the structured list
@@ -109,28 +138,13 @@ def log_validity_errors(errors):
     
     print(f"Validation issues logged to: {validity_path}")
 
-def convert_time_to_minutes(time_str):
-    """Convert time string (e.g., '0940') to minutes since midnight."""
-    hours = int(time_str[:2])
-    minutes = int(time_str[2:])
-    return hours * 60 + minutes
-
 def check_time_conflict(session1, session2):
     """Check if two sessions have a time conflict."""
-    s1_start = convert_time_to_minutes(session1['beginTime'])
-    s1_end = convert_time_to_minutes(session1['endTime'])
-    s2_start = convert_time_to_minutes(session2['beginTime'])
-    s2_end = convert_time_to_minutes(session2['endTime'])
-    
-    common_days = set(session1['daysOfWeek']) & set(session2['daysOfWeek'])
-    if not common_days:
-        return False
-    
-    return not (s1_end <= s2_start or s2_end <= s1_start)
+    return (session_occupancy_mask(session1) & session_occupancy_mask(session2)) != 0
 
 def calculate_time_gap(session1, session2):
     """Calculate the time gap between two sessions in minutes."""
-    if not set(session1['daysOfWeek']) & set(session2['daysOfWeek']):
+    if not session_day_mask(session1) & session_day_mask(session2):
         return float('inf')
     
     s1_end = convert_time_to_minutes(session1['endTime'])
@@ -138,20 +152,142 @@ def calculate_time_gap(session1, session2):
     
     return abs(s2_start - s1_end)
 
-def calculate_schedule_score(sessions):
+# Day distribution weights, with much stronger day preferences
+SCORE_DAY_WEIGHTS = {
+    'Monday': 1.5,     # Increased weight for Monday
+    'Tuesday': 1.3,    # Increased weight for Tuesday
+    'Wednesday': 1.1,  # Increased weight for Wednesday
+    'Thursday': 0.5,   # Reduced weight for Thursday
+    'Friday': 0.2      # Significantly reduced weight for Friday
+}
+EMPTY_DAY_BONUS = {'Friday': 500, 'Thursday': 300}
+CONCENTRATION_BONUS = 200   # Per weekday left without classes
+TIGHT_SCHEDULE_BONUS = 300
+# Gaps under 1x, 2x and 3x the tolerance earn 4, 2 and 1 points per minute
+# short of that limit; the tolerance is also the tight-schedule threshold
+GAP_TOLERANCE = 60
+GAP_TIERS = ((1, 4), (2, 2), (3, 1))
+PREFERRED_DAY_OFF_BONUS = 500  # Per day when preferred days off are given as a list
+
+def _objective_number(value, name, minimum=None):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value != value:
+        raise ValueError(f"{name} must be a number")
+    if minimum is not None and value < minimum:
+        raise ValueError(f"{name} must be at least {minimum}")
+    return value
+
+def _objective_days(value, name, minimum=None):
+    if not isinstance(value, dict):
+        raise ValueError(f"{name} must map day names to numbers")
+    days = {}
+    for day, number in value.items():
+        day = str(day).capitalize()
+        if day not in DAY_INDEX:
+            raise ValueError(f"{name} has an unknown day: {day}")
+        days[day] = _objective_number(number, f"{name}.{day}", minimum)
+    return days
+
+class ScoringObjective:
+    """
+    The schedule score, compiled into lookup tables for the search.
+    spec is the "objective" object sent with /restrictions. Every key is
+    optional and the defaults reproduce the constants above:
+        day_weights          {day: weight} added per session meeting that day
+        preferred_days_off   {day: bonus} for leaving a day empty, or a list
+                             of days worth PREFERRED_DAY_OFF_BONUS each
+        concentration_bonus  per weekday left without classes
+        tight_schedule_bonus when most gaps are under the gap tolerance
+        gap_tolerance        minutes; sets the three gap tiers
+    Raises ValueError for a malformed spec.
+    """
+    
+    KEYS = ('day_weights', 'preferred_days_off', 'concentration_bonus',
+            'tight_schedule_bonus', 'gap_tolerance')
+    
+    def __init__(self, spec=None):
+        spec = spec or {}
+        if not isinstance(spec, dict):
+            raise ValueError("objective must be an object")
+        unknown = set(spec) - set(self.KEYS)
+        if unknown:
+            raise ValueError(f"Unknown objective settings: {', '.join(sorted(unknown))}")
+        
+        day_weights = dict(SCORE_DAY_WEIGHTS)
+        day_weights.update(_objective_days(spec.get('day_weights', {}), 'day_weights'))
+        
+        days_off = spec.get('preferred_days_off', EMPTY_DAY_BONUS)
+        if isinstance(days_off, list):
+            days_off = {day: PREFERRED_DAY_OFF_BONUS for day in days_off}
+        days_off = _objective_days(days_off, 'preferred_days_off', minimum=0)
+        
+        concentration_bonus = _objective_number(
+            spec.get('concentration_bonus', CONCENTRATION_BONUS), 'concentration_bonus', minimum=0)
+        tight_schedule_bonus = _objective_number(
+            spec.get('tight_schedule_bonus', TIGHT_SCHEDULE_BONUS), 'tight_schedule_bonus')
+        gap_tolerance = _objective_number(spec.get('gap_tolerance', GAP_TOLERANCE), 'gap_tolerance', minimum=1)
+        if gap_tolerance != int(gap_tolerance) or gap_tolerance > 240:
+            raise ValueError("gap_tolerance must be a whole number of minutes up to 240")
+        gap_tolerance = int(gap_tolerance)
+        
+        # Normalised spec, e.g. for saving alongside a schedule
+        self.spec = {
+            'day_weights': day_weights,
+            'preferred_days_off': days_off,
+            'concentration_bonus': concentration_bonus,
+            'tight_schedule_bonus': tight_schedule_bonus,
+            'gap_tolerance': gap_tolerance
+        }
+        
+        # Lookup tables for the hot loop
+        self.day_weights = tuple(day_weights.get(day, 0) for day in DAYS_OF_WEEK)
+        self.small_gap = gap_tolerance
+        self.gap_table = tuple(self._tier_score(gap, gap_tolerance)
+                               for gap in range(GAP_TIERS[-1][0] * gap_tolerance))
+        self.max_gap_score = max(self.gap_table, default=0)
+        self.tight_schedule_bonus = tight_schedule_bonus
+        
+        # Empty-day and concentration bonuses only depend on which days are
+        # used, so both are precomputed for every weekly day mask
+        self.day_mask_bonus = tuple(
+            sum(bonus for day, bonus in days_off.items() if not mask & (1 << DAY_INDEX[day])) +
+            (5 - bin(mask).count('1')) * concentration_bonus
+            for mask in range(1 << len(DAYS_OF_WEEK))
+        )
+    
+    @staticmethod
+    def _tier_score(gap, gap_tolerance):
+        for multiple, points in GAP_TIERS:
+            if gap < multiple * gap_tolerance:
+                return (multiple * gap_tolerance - gap) * points
+        return 0
+    
+    def gap_score(self, gap):
+        """Score a single gap (in minutes) between consecutive sessions on one day."""
+        return self.gap_table[gap] if gap < len(self.gap_table) else 0
+    
+    def session_weight(self, day_indices):
+        return sum(self.day_weights[day] for day in day_indices)
+
+DEFAULT_OBJECTIVE = ScoringObjective()
+
+def calculate_schedule_score(sessions, objective=None):
     """Calculate a score for the schedule based on time gaps and day distribution."""
     if not sessions:
         return 0
+    objective = objective or DEFAULT_OBJECTIVE
     
     # Initialize day counts
     day_counts = defaultdict(int)
+    day_mask = 0
     for session in sessions:
         for day in session['daysOfWeek']:
             day_counts[day] += 1
+        day_mask |= session_day_mask(session)
     
-    # Calculate time gap score
+    # Calculate time gap score, counting small gaps for the tight schedule bonus
     total_gap_score = 0
     num_gaps = 0
+    small_gaps = 0
     
     # Sort sessions by day and time
     for day in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']:
@@ -160,54 +296,122 @@ def calculate_schedule_score(sessions):
         
         for i in range(len(day_sessions) - 1):
             gap = calculate_time_gap(day_sessions[i], day_sessions[i + 1])
-            if gap < 60:  # Strongly prefer gaps less than 1 hour
-                total_gap_score += (60 - gap) * 4  # Quadruple the score for sub-1-hour gaps
-            elif gap < 120:  # Still prefer gaps less than 2 hours
-                total_gap_score += (120 - gap) * 2
-            elif gap < 180:  # Slightly prefer gaps less than 3 hours
-                total_gap_score += (180 - gap)
+            total_gap_score += objective.gap_score(gap)
+            if gap < objective.small_gap:
+                small_gaps += 1
             num_gaps += 1
     
     gap_score = total_gap_score / (num_gaps if num_gaps > 0 else 1)
     
-    # Calculate day distribution score with much stronger day preferences
-    day_weights = {
-        'Monday': 1.5,     # Increased weight for Monday
-        'Tuesday': 1.3,    # Increased weight for Tuesday
-        'Wednesday': 1.1,  # Increased weight for Wednesday
-        'Thursday': 0.5,   # Reduced weight for Thursday
-        'Friday': 0.2      # Significantly reduced weight for Friday
-    }
+    # Bonus for empty preferred days off and for a concentrated schedule
+    day_bonus = objective.day_mask_bonus[day_mask]
     
-    # Add bonus for empty days (especially Thursday and Friday)
-    empty_day_bonus = 0
-    if 'Friday' not in day_counts:
-        empty_day_bonus += 500
-    if 'Thursday' not in day_counts:
-        empty_day_bonus += 300
+    # Add extra bonus for very tight schedules (most gaps under the tolerance)
+    tight_schedule_bonus = 0
+    if num_gaps > 0 and (small_gaps / num_gaps) > 0.5:
+        tight_schedule_bonus = objective.tight_schedule_bonus
     
-    # Add bonus for concentrated schedule
-    used_days = len(day_counts)
-    concentration_bonus = (5 - used_days) * 200  # Bonus points for using fewer days
+    day_score = sum(count * objective.day_weights[DAY_INDEX[day]] for day, count in day_counts.items())
     
-    # Add extra bonus for very tight schedules (most gaps under 1 hour)
-    tight_schedule_bonus = 0
-    total_gaps = 0
-    small_gaps = 0
-    for day in day_counts:
-        day_sessions = [s for s in sessions if day in s['daysOfWeek']]
-        for i in range(len(day_sessions) - 1):
-            gap = calculate_time_gap(day_sessions[i], day_sessions[i + 1])
-            if gap < 60:
-                small_gaps += 1
-            total_gaps += 1
+    return gap_score + day_score * 100 + day_bonus + tight_schedule_bonus
+
+class ScoreState:
+    """
+    Running calculate_schedule_score for the schedule search.
+    Sessions are pushed and popped in stack order as the search descends and
+    backtracks. Each weekday keeps its sessions sorted by start time, so adding
+    or removing one only re-scores the gaps next to it, and score() is a
+    constant-time combination of the running totals.
+    """
+    
+    # Gaps are only scored Monday through Friday, as in calculate_schedule_score
+    GAP_DAYS = range(5)
+    
+    def __init__(self, objective=None):
+        objective = objective or DEFAULT_OBJECTIVE
+        self.day_sessions = [[] for _ in DAYS_OF_WEEK]  # sorted (begin, end) minutes
+        self.day_counts = [0] * len(DAYS_OF_WEEK)
+        self.day_weights = objective.day_weights
+        self.gap_table = objective.gap_table
+        self.small_gap = objective.small_gap
+        self.day_mask_bonus = objective.day_mask_bonus
+        self.tight_schedule_bonus = objective.tight_schedule_bonus
+        self.day_mask = 0
+        self.session_count = 0
+        self.total_gap_score = 0
+        self.num_gaps = 0
+        self.small_gaps = 0
+    
+    def _add_gap(self, earlier, later, sign):
+        gap = abs(later[0] - earlier[1])
+        if gap < len(self.gap_table):
+            self.total_gap_score += sign * self.gap_table[gap]
+        self.num_gaps += sign
+        if gap < self.small_gap:
+            self.small_gaps += sign
     
-    if total_gaps > 0 and (small_gaps / total_gaps) > 0.5:
-        tight_schedule_bonus = 300  # Bonus for having mostly small gaps
+    def push(self, begin, end, day_indices):
+        """Add a session given its start/end minutes and the indices of its days."""
+        entry = (begin, end)
+        for day in day_indices:
+            self.day_counts[day] += 1
+            self.day_mask |= 1 << day
+            if day not in self.GAP_DAYS:
+                continue
+            
+            sessions = self.day_sessions[day]
+            i = bisect.bisect_left(sessions, entry)
+            previous = sessions[i - 1] if i > 0 else None
+            following = sessions[i] if i < len(sessions) else None
+            if previous and following:
+                self._add_gap(previous, following, -1)
+            if previous:
+                self._add_gap(previous, entry, 1)
+            if following:
+                self._add_gap(entry, following, 1)
+            sessions.insert(i, entry)
+        self.session_count += 1
     
-    day_score = sum(count * day_weights[day] for day, count in day_counts.items())
+    def pop(self, begin, end, day_indices):
+        """Remove a session previously added with push()."""
+        entry = (begin, end)
+        for day in day_indices:
+            self.day_counts[day] -= 1
+            if not self.day_counts[day]:
+                self.day_mask &= ~(1 << day)
+            if day not in self.GAP_DAYS:
+                continue
+            
+            sessions = self.day_sessions[day]
+            i = bisect.bisect_left(sessions, entry)
+            del sessions[i]
+            previous = sessions[i - 1] if i > 0 else None
+            following = sessions[i] if i < len(sessions) else None
+            if previous:
+                self._add_gap(previous, entry, -1)
+            if following:
+                self._add_gap(entry, following, -1)
+            if previous and following:
+                self._add_gap(previous, following, 1)
+        self.session_count -= 1
     
-    return gap_score + day_score * 100 + empty_day_bonus + concentration_bonus + tight_schedule_bonus
+    def day_score(self):
+        """Weighted session count over the days used so far."""
+        return sum(count * weight for count, weight in zip(self.day_counts, self.day_weights))
+    
+    def score(self):
+        """Same value calculate_schedule_score gives for the current sessions."""
+        if not self.session_count:
+            return 0
+        
+        gap_score = self.total_gap_score / (self.num_gaps if self.num_gaps > 0 else 1)
+        
+        tight_schedule_bonus = 0
+        if self.num_gaps > 0 and (self.small_gaps / self.num_gaps) > 0.5:
+            tight_schedule_bonus = self.tight_schedule_bonus
+        
+        return (gap_score + self.day_score() * 100 + self.day_mask_bonus[self.day_mask] +
+                tight_schedule_bonus)
 
 def get_required_session_types(course_sessions):
     """Determine which session types are required for a course."""
@@ -216,89 +420,575 @@ def get_required_session_types(course_sessions):
         types[session['meetingScheduleType']] = True
     return types
 
-def select_best_schedule(course_data, time_preferences=None):
-    """Select the best possible schedule without conflicts, respecting time preferences."""
-    best_schedule = None
-    best_score = float('-inf')
-    
-    def try_combinations(schedule, remaining_courses, selected_sessions):
-        nonlocal best_schedule, best_score
-        
-        if not remaining_courses:
-            score = calculate_schedule_score(selected_sessions)
-            if score > best_score:
-                best_score = score
-                best_schedule = {k: v[:] for k, v in schedule.items()}
-            return True
-        
-        course_code = remaining_courses[0]
-        course_sessions = course_data[course_code]
+def score_upper_bound(day_mask, day_score, objective=None):
+    """
+    Optimistic score for any schedule that extends a partial one.
+    day_mask holds the days already used and day_score their weighted session
+    count (including the best case for the sessions still to be chosen). Adding
+    sessions can only use more days, so the empty-day and concentration bonuses
+    (never negative) are already at their best; gaps and tightness are assumed
+    perfect.
+    """
+    objective = objective or DEFAULT_OBJECTIVE
+    return (objective.max_gap_score + day_score * 100 + objective.day_mask_bonus[day_mask] +
+            max(objective.tight_schedule_bonus, 0))
+
+def schedule_signature(schedule):
+    """Identify a schedule by the sections a student would register for."""
+    return frozenset(
+        (course_code, session['meetingScheduleType'], session['courseReferenceNumber'])
+        for course_code, sessions in schedule.items()
+        for session in sessions
+    )
+
+# Day preference used to order sections within a type (Monday first)
+SECTION_DAY_PREFERENCE = {
+    'Monday': 5,
+    'Tuesday': 4,
+    'Wednesday': 3,
+    'Thursday': 2,
+    'Friday': 1
+}
+
+def section_day_preference_key(session, objective=None):
+    """Prefer sections whose earliest-in-preference day ranks highest, then later starts."""
+    return (
+        min(SECTION_DAY_PREFERENCE.get(day, 0) for day in session.days),
+        session.begin
+    )
+
+def section_score_key(session, objective=None):
+    """
+    Estimate how much a section adds to the objective's score on its own:
+    its weighted day count, less the empty-day and concentration bonuses its
+    days could cost. Earlier starts break ties.
+    """
+    objective = objective or DEFAULT_OBJECTIVE
+    day_mask_bonus = objective.day_mask_bonus
+    estimate = objective.session_weight(session.day_indices) * 100
+    estimate -= day_mask_bonus[0] - day_mask_bonus[session.day_mask]
+    return (estimate, -session.begin)
+
+def course_remaining_values_order(slots):
+    """
+    Minimum remaining values: courses with the fewest viable sections across
+    their required types go first. A course's slots stay together and in
+    LEC, LAB, TUT order; ties keep the input course order.
+    """
+    viable_sections = defaultdict(int)
+    for course_code, candidates in slots:
+        viable_sections[course_code] += len(candidates)
+    return sorted(slots, key=lambda slot: viable_sections[slot[0]])
+
+# Variable-ordering heuristics as (slot ordering or None, section sort key).
+# A slot ordering takes and returns the list of slots, None keeps the input
+# course order; sections sort descending by the key, which is called with
+# the section and the ScoringObjective.
+SEARCH_HEURISTICS = {
+    'input': (None, section_day_preference_key),
+    'mrv': (course_remaining_values_order, section_day_preference_key),
+    'score': (None, section_score_key),
+    'mrv_score': (course_remaining_values_order, section_score_key),
+}
+DEFAULT_HEURISTIC = 'mrv_score'
+
+def build_search_slots(course_data, time_preferences=None, heuristic=DEFAULT_HEURISTIC,
+                       collapse_equivalent=True, objective=None):
+    """
+    Flatten the search into slots: one (course, type) pair per required
+    session type, each with its filtered, sorted and compiled candidates.
+    heuristic names an entry of SEARCH_HEURISTICS or is a (slot ordering,
+    section key) pair of its own.
+    With collapse_equivalent, sections that meet at exactly the same times
+    become one candidate (see collapse_equivalent_sessions); organize_by_day
+    lists the others as alternate CRNs.
+    objective, a ScoringObjective, supplies the candidate day weights.
+    Returns None when some required type has no section left to choose.
+    """
+    objective = objective or DEFAULT_OBJECTIVE
+    course_data = sessions_from_course_data(course_data)
+    if isinstance(heuristic, str):
+        heuristic = SEARCH_HEURISTICS[heuristic]
+    slot_order, section_key = heuristic
+
+    slots = []
+    for course_code, course_sessions in course_data.items():
         required_types = get_required_session_types(course_sessions)
-        schedule[course_code] = []
-        
-        # Group sessions by type
         sessions_by_type = defaultdict(list)
         for session in course_sessions:
             # Skip sessions that don't meet time preferences
             if time_preferences and not time_preferences.is_time_allowed(session):
                 continue
-            sessions_by_type[session['meetingScheduleType']].append(session)
+            sessions_by_type[session.meeting_type].append(session)
         
-        # Sort sessions within each type by day preference and time
-        for session_type in sessions_by_type:
-            sessions_by_type[session_type].sort(
-                key=lambda x: (
-                    min(day_weights.get(day, 0) for day in x['daysOfWeek']),
-                    convert_time_to_minutes(x['beginTime'])
-                ),
-                reverse=True
-            )
-        
-        def try_session_type(schedule, course_code, remaining_types, selected_sessions):
-            if not remaining_types:
-                return try_combinations(schedule, remaining_courses[1:], selected_sessions)
-            
-            session_type = remaining_types[0]
+        for session_type in ['LEC', 'LAB', 'TUT']:
             if not required_types[session_type]:
-                return try_session_type(schedule, course_code, remaining_types[1:], selected_sessions)
-            
-            # If no valid sessions exist for a required type, return False
-            if required_types[session_type] and not sessions_by_type[session_type]:
-                return False
+                continue
             
-            for session in sessions_by_type[session_type]:
-                if not any(check_time_conflict(session, existing) for existing in selected_sessions):
-                    schedule[course_code].append(session)
-                    selected_sessions.append(session)
-                    
-                    if try_session_type(schedule, course_code, remaining_types[1:], selected_sessions):
-                        return True
-                    
-                    schedule[course_code].remove(session)
-                    selected_sessions.remove(session)
+            # If no valid sessions exist for a required type, no schedule is possible
+            if not sessions_by_type[session_type]:
+                return None
             
-            return False
+            sessions = sessions_by_type[session_type]
+            if collapse_equivalent:
+                sessions = collapse_equivalent_sessions(sessions)
+            sessions = sorted(sessions, key=lambda session: section_key(session, objective), reverse=True)
+            candidates = [
+                (session,
+                 session.occupancy,
+                 session.day_mask,
+                 objective.session_weight(session.day_indices),
+                 session.begin,
+                 session.end,
+                 session.day_indices)
+                for session in sessions
+            ]
+            slots.append((course_code, candidates))
+    
+    if slot_order:
+        slots = slot_order(slots)
+    return slots
+
+# Largest product of three domain sizes the triple check will enumerate
+TRIPLE_CHECK_LIMIT = 20000
+
+def _revise(domains, i, j):
+    """Drop the values of slot i that overlap every value of slot j; True if any went."""
+    supported = [a for a in domains[i] if any(not a & b for b in domains[j])]
+    changed = len(supported) != len(domains[i])
+    domains[i] = supported
+    return changed
+
+def arc_consistent_domains(domains, members):
+    """
+    AC-3 over the occupancy masks of the slots in members (indices into
+    domains). Returns the reduced domains as {index: [mask, ...]}, or None
+    when some slot is left with no section compatible with the others.
+    """
+    domains = {i: list(domains[i]) for i in members}
+    queue = deque((i, j) for i in members for j in members if i != j)
+    queued = set(queue)
+    while queue:
+        i, j = queue.popleft()
+        queued.discard((i, j))
+        if _revise(domains, i, j):
+            if not domains[i]:
+                return None
+            for k in members:
+                if k != i and k != j and (k, i) not in queued:
+                    queue.append((k, i))
+                    queued.add((k, i))
+    return domains
+
+def _triple_satisfiable(first, second, third):
+    for a in first:
+        for b in second:
+            if a & b:
+                continue
+            both = a | b
+            if any(not both & c for c in third):
+                return True
+    return False
+
+def _components_infeasible(domains, members):
+    """Sound test: True only if the slots in members cannot all be filled."""
+    reduced = arc_consistent_domains(domains, members)
+    if reduced is None:
+        return True
+    if len(members) == 3:
+        return not _triple_satisfiable(*(reduced[i] for i in members))
+    return False
+
+def find_conflicting_components(slots):
+    """
+    Conflict-graph pre-check on the slots from build_search_slots.
+    Arc consistency catches every pairwise conflict (and chains of them),
+    then every triple of slots small enough for TRIPLE_CHECK_LIMIT is checked
+    exactly. A conflict is shrunk by deleting slots while the rest stays
+    infeasible, so what is returned is a minimal conflicting set.
+    Returns [(course_code, session_type), ...], or [] when no conflict was
+    found (which does not prove a schedule exists).
+    """
+    domains = [list(dict.fromkeys(candidate[1] for candidate in candidates))
+               for _, candidates in slots]
+    members = list(range(len(slots)))
+    
+    conflict = None
+    if arc_consistent_domains(domains, members) is None:
+        conflict = members
+    else:
+        for triple in itertools.combinations(members, 3):
+            size = len(domains[triple[0]]) * len(domains[triple[1]]) * len(domains[triple[2]])
+            if size <= TRIPLE_CHECK_LIMIT and _components_infeasible(domains, triple):
+                conflict = list(triple)
+                break
+    if conflict is None:
+        return []
+    
+    for member in list(conflict):
+        remaining = [i for i in conflict if i != member]
+        if len(remaining) >= 2 and _components_infeasible(domains, remaining):
+            conflict = remaining
+    
+    return [(slots[i][0], slots[i][1][0][0].meeting_type) for i in conflict]
+
+class SearchStats:
+    """Counters describing how much of the search tree a run visited."""
+    
+    def __init__(self):
+        self.nodes = 0              # Partial or complete schedules visited
+        self.leaves = 0             # Complete conflict-free schedules scored
+        self.pruned = 0             # Subtrees cut off by the score bound
+        self.budget_exhausted = False
+        self.seconds = 0.0
+    
+    def add(self, other):
+        self.nodes += other.nodes
+        self.leaves += other.leaves
+        self.pruned += other.pruned
+        self.budget_exhausted = self.budget_exhausted or other.budget_exhausted
+    
+    def as_dict(self):
+        return {
+            'nodes': self.nodes,
+            'leaves': self.leaves,
+            'pruned': self.pruned,
+            'budget_exhausted': self.budget_exhausted,
+            'seconds': round(self.seconds, 4)
+        }
+
+class SearchResult:
+    """
+    Outcome of run_schedule_search.
+    schedules is the best-first list of (score, schedule) pairs found. optimal
+    is True when the search finished, and so proved them the best; it is
+    False when a time or node budget cut it short and they are only the best
+    found so far.
+    """
+    
+    def __init__(self, schedules, optimal, stats):
+        self.schedules = schedules
+        self.optimal = optimal
+        self.stats = stats
+    
+    @property
+    def best_schedule(self):
+        return self.schedules[0][1] if self.schedules else {}
+    
+    @property
+    def best_score(self):
+        return self.schedules[0][0] if self.schedules else None
+
+class SearchBudgetExhausted(Exception):
+    """Raised inside the search to unwind once its time or node budget is spent."""
+
+# How many search nodes a parallel worker visits between reads of the shared bound
+SHARED_BOUND_SYNC_INTERVAL = 256
+# How many search nodes are visited between checks of the wall-clock deadline
+DEADLINE_CHECK_INTERVAL = 256
+
+def search_schedules(slots, course_codes, top_k=None, prefix=(), shared_best=None, stats=None,
+                     deadline=None, node_budget=None, objective=None, on_improvement=None):
+    """
+    Branch-and-bound search over the slots from build_search_slots.
+    Returns the best max(top_k, 1) distinct schedules as (score, schedule)
+    pairs, best first.
+    
+    prefix: candidate indices fixing the first slots, to search one subtree.
+    shared_best: multiprocessing.Value sharing the K-th best score between
+        parallel workers.
+    stats: SearchStats incremented with this run's counters.
+    deadline: time.monotonic() value after which the best so far is returned.
+    node_budget: node count after which the best so far is returned.
+    objective: ScoringObjective to maximise; the slots must have been built
+        with the same one.
+    on_improvement: called as (score, schedule) with each new best; schedule
+        must not be modified.
+    """
+    objective = objective or DEFAULT_OBJECTIVE
+    capacity = top_k or 1
+    ranked = []  # Min-heap of (score, order, signature, schedule)
+    ranked_by_signature = {}
+    found_order = itertools.count()
+    shared_floor = float('-inf')
+    best_found = float('-inf')
+    nodes_until_sync = 0
+    nodes = leaves = pruned = 0
+    nodes_until_deadline_check = 0
+    
+    # remaining_day_score[i] is the most day score slots i.. can still add
+    remaining_day_score = [0] * (len(slots) + 1)
+    for i in range(len(slots) - 1, -1, -1):
+        remaining_day_score[i] = remaining_day_score[i + 1] + max(c[3] for c in slots[i][1])
+    
+    schedule = {course_code: [] for course_code in course_codes}
+    score_state = ScoreState(objective)
+    
+    def incumbent_score():
+        """Score a new schedule has to beat to be kept."""
+        local_floor = ranked[0][0] if len(ranked) >= capacity else float('-inf')
+        return max(local_floor, shared_floor)
+    
+    def record_schedule(score):
+        nonlocal best_found
+        signature = schedule_signature(schedule)
+        existing = ranked_by_signature.get(signature)
+        if existing is not None:
+            # Same sections reached through different meetings: keep the better one
+            if score <= existing[0]:
+                return
+            ranked.remove(existing)
+            heapq.heapify(ranked)
+        elif len(ranked) >= capacity:
+            evicted = heapq.heappop(ranked)
+            del ranked_by_signature[evicted[2]]
         
-        if not try_session_type(schedule, course_code, ['LEC', 'LAB', 'TUT'], selected_sessions):
-            del schedule[course_code]
-            return False
+        entry = (score, next(found_order), signature, {k: v[:] for k, v in schedule.items()})
+        heapq.heappush(ranked, entry)
+        ranked_by_signature[signature] = entry
         
-        return True
+        if score > best_found:
+            best_found = score
+            if on_improvement is not None:
+                on_improvement(score, entry[3])
+        
+        # Another worker's K distinct schedules at or above this score make
+        # anything at or below it useless to us too
+        if shared_best is not None and len(ranked) >= capacity:
+            with shared_best.get_lock():
+                if ranked[0][0] > shared_best.value:
+                    shared_best.value = ranked[0][0]
     
-    # Define day weights for sorting
-    global day_weights
-    day_weights = {
-        'Monday': 5,
-        'Tuesday': 4,
-        'Wednesday': 3,
-        'Thursday': 2,
-        'Friday': 1
-    }
+    def try_slot(slot_index, occupied, day_mask, day_score):
+        nonlocal shared_floor, nodes_until_sync, nodes, leaves, pruned, nodes_until_deadline_check
+        nodes += 1
+        
+        if node_budget is not None and nodes > node_budget:
+            raise SearchBudgetExhausted()
+        if deadline is not None:
+            nodes_until_deadline_check -= 1
+            if nodes_until_deadline_check <= 0:
+                if time.monotonic() >= deadline:
+                    raise SearchBudgetExhausted()
+                nodes_until_deadline_check = DEADLINE_CHECK_INTERVAL
+        
+        if shared_best is not None:
+            nodes_until_sync -= 1
+            if nodes_until_sync <= 0:
+                shared_floor = shared_best.value
+                nodes_until_sync = SHARED_BOUND_SYNC_INTERVAL
+        
+        if slot_index == len(slots):
+            leaves += 1
+            score = score_state.score()
+            if score > incumbent_score():
+                record_schedule(score)
+            return
+        
+        # Prune when even a perfect completion cannot beat the incumbent
+        if score_upper_bound(day_mask, day_score + remaining_day_score[slot_index],
+                             objective) <= incumbent_score():
+            pruned += 1
+            return
+        
+        course_code, candidates = slots[slot_index]
+        if slot_index < len(prefix):
+            candidates = [candidates[prefix[slot_index]]]
+        
+        for session, mask, days, weight, begin, end, day_indices in candidates:
+            # A single AND against everything already selected replaces the
+            # pairwise check_time_conflict scan
+            if mask & occupied:
+                continue
+            
+            schedule[course_code].append(session)
+            score_state.push(begin, end, day_indices)
+            
+            try_slot(slot_index + 1, occupied | mask, day_mask | days, day_score + weight)
+            
+            schedule[course_code].pop()
+            score_state.pop(begin, end, day_indices)
     
     # Start the recursive search
-    try_combinations({}, list(course_data.keys()), [])
+    exhausted = False
+    try:
+        try_slot(0, 0, 0, 0)
+    except SearchBudgetExhausted:
+        exhausted = True
+    
+    if stats is not None:
+        stats.nodes += nodes
+        stats.leaves += leaves
+        stats.pruned += pruned
+        stats.budget_exhausted = stats.budget_exhausted or exhausted
+    
+    return [(entry[0], entry[3]) for entry in sorted(ranked, key=lambda e: (-e[0], e[1]))]
+
+def split_search_prefixes(slots, workers, max_depth=2):
+    """
+    Split the search tree into subtrees by fixing the choices for the first
+    one or two slots, stopping once there are a few subtrees per worker.
+    Returns the conflict-free prefixes as tuples of candidate indices.
+    """
+    prefixes = [((), 0)]
+    depth = 0
+    while depth < min(max_depth, len(slots)) and len(prefixes) < workers * 4:
+        next_prefixes = []
+        for indices, occupied in prefixes:
+            for i, candidate in enumerate(slots[depth][1]):
+                if not candidate[1] & occupied:
+                    next_prefixes.append((indices + (i,), occupied | candidate[1]))
+        prefixes = next_prefixes
+        depth += 1
+    return [indices for indices, _ in prefixes]
+
+# Search inputs a pool worker receives once, when the process starts
+_worker_search = {}
+
+def _init_search_worker(slots, course_codes, top_k, shared_best, deadline, node_budget, objective):
+    _worker_search.update(slots=slots, course_codes=course_codes, top_k=top_k,
+                          shared_best=shared_best, deadline=deadline, node_budget=node_budget,
+                          objective=objective)
+
+def _search_subtree(prefix):
+    stats = SearchStats()
+    results = search_schedules(_worker_search['slots'], _worker_search['course_codes'],
+                               _worker_search['top_k'], prefix, _worker_search['shared_best'], stats,
+                               _worker_search['deadline'], _worker_search['node_budget'],
+                               _worker_search['objective'])
+    return results, stats
+
+def parallel_search_schedules(slots, course_codes, top_k=None, workers=None, stats=None,
+                              deadline=None, node_budget=None, objective=None, on_improvement=None):
+    """
+    Run search_schedules over a ProcessPoolExecutor, one task per subtree from
+    split_search_prefixes, and merge the results into one best-first list.
+    
+    workers: processes to use (os.cpu_count() if None).
+    deadline: applies to every subtree.
+    node_budget: split evenly between the subtrees.
+    on_improvement: called as merged subtree results raise the best score.
+    See search_schedules for the other arguments.
+    """
+    workers = workers or os.cpu_count() or 1
+    prefixes = split_search_prefixes(slots, workers)
+    shared_best = multiprocessing.Value('d', float('-inf'))
+    if node_budget is not None and prefixes:
+        node_budget = -(-node_budget // len(prefixes))
+    
+    merged = {}
+    best_found = float('-inf')
+    with ProcessPoolExecutor(max_workers=workers,
+                             initializer=_init_search_worker,
+                             initargs=(slots, course_codes, top_k, shared_best,
+                                       deadline, node_budget, objective)) as executor:
+        for order, (results, subtree_stats) in enumerate(executor.map(_search_subtree, prefixes)):
+            if stats is not None:
+                stats.add(subtree_stats)
+            for rank, (score, schedule) in enumerate(results):
+                signature = schedule_signature(schedule)
+                if signature not in merged or score > merged[signature][0]:
+                    merged[signature] = (score, (order, rank), schedule)
+            if results and results[0][0] > best_found:
+                best_found = results[0][0]
+                if on_improvement is not None:
+                    on_improvement(*results[0])
     
-    return best_schedule if best_schedule else {}
+    best = sorted(merged.values(), key=lambda entry: (-entry[0], entry[1]))[:top_k or 1]
+    return [(score, schedule) for score, _, schedule in best]
+
+def run_schedule_search(course_data, time_preferences=None, top_k=None, workers=None,
+                        heuristic=DEFAULT_HEURISTIC, time_budget=None, node_budget=None,
+                        objective=None, on_improvement=None):
+    """
+    Anytime schedule search returning a SearchResult.
+    time_budget (seconds) and node_budget cap the search; once either runs out
+    the best schedules found so far come back with optimal=False. Without a
+    budget the search runs to completion and the result is optimal.
+    on_improvement(score, schedule) is called with each new best schedule as
+    it is found (see search_schedules).
+    See select_best_schedule for the other arguments.
+    """
+    stats = SearchStats()
+    started = time.monotonic()
+    deadline = started + time_budget if time_budget is not None else None
+    
+    slots = build_search_slots(course_data, time_preferences, heuristic, objective=objective)
+    if slots is None:
+        results = []
+    elif workers and workers > 1:
+        results = parallel_search_schedules(slots, list(course_data), top_k, workers, stats,
+                                            deadline, node_budget, objective, on_improvement)
+    else:
+        results = search_schedules(slots, list(course_data), top_k, stats=stats,
+                                   deadline=deadline, node_budget=node_budget, objective=objective,
+                                   on_improvement=on_improvement)
+    
+    stats.seconds = time.monotonic() - started
+    return SearchResult(results, not stats.budget_exhausted, stats)
+
+def select_best_schedule(course_data, time_preferences=None, top_k=None, workers=None,
+                         heuristic=DEFAULT_HEURISTIC, stats=None, time_budget=None, node_budget=None,
+                         objective=None):
+    """
+    Select the best-scoring schedule without conflicts, respecting time
+    preferences.
+    
+    top_k: return the K best distinct schedules as best-first
+        (score, schedule) pairs.
+    workers: split the search across this many processes when greater than 1.
+    heuristic: slot and section ordering, a key of SEARCH_HEURISTICS.
+    stats: SearchStats filled in with the search counters.
+    time_budget, node_budget: return the best so far once either runs out.
+    objective: ScoringObjective to maximise (DEFAULT_OBJECTIVE if None).
+    """
+    result = run_schedule_search(course_data, time_preferences, top_k, workers, heuristic,
+                                 time_budget, node_budget, objective)
+    if stats is not None:
+        stats.add(result.stats)
+        stats.seconds += result.stats.seconds
+    
+    if top_k:
+        return result.schedules
+    return result.best_schedule
+
+def compare_heuristics(course_data, time_preferences=None, heuristics=None, top_k=None,
+                       objective=None):
+    """
+    Run the search once per ordering heuristic on the same input.
+    Returns one dict per heuristic with the best score found, the search
+    counters and the wall-clock time, so orderings can be compared directly.
+    """
+    comparison = []
+    for name in heuristics or SEARCH_HEURISTICS:
+        result = run_schedule_search(course_data, time_preferences, top_k=top_k or 1, heuristic=name,
+                                     objective=objective)
+        comparison.append({
+            'heuristic': name,
+            'best_score': result.best_score,
+            **result.stats.as_dict()
+        })
+    return comparison
+
+def print_heuristic_comparison():
+    """Compare the ordering heuristics on the saved course data and time restrictions."""
+    course_data = load_course_sessions(os.path.join("Schedule Jsons", "combined_courses.json"))
+    try:
+        time_prefs = load_time_preferences()
+    except (FileNotFoundError, json.JSONDecodeError):
+        time_prefs = TimePreference()
+    
+    print(f"{'Heuristic':<12}{'Score':>12}{'Nodes':>10}{'Leaves':>10}{'Pruned':>10}{'Seconds':>10}")
+    print("-" * 64)
+    for row in compare_heuristics(course_data, time_prefs, objective=load_scoring_objective()):
+        score = f"{row['best_score']:.1f}" if row['best_score'] is not None else "none"
+        print(f"{row['heuristic']:<12}{score:>12}{row['nodes']:>10}{row['leaves']:>10}"
+              f"{row['pruned']:>10}{row['seconds']:>10}")
+
+# Number of ranked schedules main() saves: the best plus its runner-up alternatives
+TOP_K_SCHEDULES = 3
+# Seconds main() lets the search run before settling for the best schedule so far
+SEARCH_TIME_BUDGET = 10
 
 def format_time(time_str):
     """Convert time from 24hr format to 12hr format."""
@@ -337,7 +1027,12 @@ def organize_by_day(schedule):
                     'room': room,  # Use formatted room
                     'campus': session.get('campus', 'TBA'),
                     'building': building,
-                    'prof': session.get('displayName', 'TBA')
+                    'prof': session.get('displayName', 'TBA'),
+                    'start_date': session.get('startdate'),
+                    'end_date': session.get('enddate'),
+                    # Same-time sections collapsed into this one before the search
+                    'alternate_crns': [equivalent['courseReferenceNumber']
+                                       for equivalent in getattr(session, 'equivalents', ())]
                 }
                 days_schedule[day].append(session_info)
     
@@ -370,24 +1065,18 @@ def print_schedule_by_day(schedule):
             print(f"    Room: {session['room']}")
             print(f"    Campus: {session['campus']}")
             print(f"    CRN: {session['crn']}")
+            if session['alternate_crns']:
+                print(f"    Same time: CRN {', '.join(session['alternate_crns'])}")
             print()
 
-def schedule_to_json(schedule):
-    """Convert schedule to a JSON-friendly format."""
+def weekly_schedule_to_json(schedule):
+    """Convert a schedule to a JSON-friendly day-by-day listing."""
     daily_schedule = organize_by_day(schedule)
+    weekly_schedule = {}
     
-    json_schedule = {
-        'schedule_info': {
-            'generated_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'total_courses': len(schedule)
-        },
-        'weekly_schedule': {}
-    }
-    
-    # Convert daily schedule to JSON format
     for day in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']:
         if day in daily_schedule and daily_schedule[day]:
-            json_schedule['weekly_schedule'][day] = [
+            weekly_schedule[day] = [
                 {
                     'course_code': session['course_code'],
                     'type': session['type'],
@@ -397,17 +1086,189 @@ def schedule_to_json(schedule):
                     'campus': session['campus'],
                     'crn': session['crn'],
                     'building': session['building'],
-                    'prof': session['prof']
+                    'prof': session['prof'],
+                    'start_date': session['start_date'],
+                    'end_date': session['end_date'],
+                    'alternate_crns': session['alternate_crns']
                 }
                 for session in daily_schedule[day]
             ]
         else:
-            json_schedule['weekly_schedule'][day] = []
+            weekly_schedule[day] = []
+    
+    return weekly_schedule
+
+def schedule_to_json(schedule, alternatives=None):
+    """
+    Convert schedule to a JSON-friendly format.
+    alternatives is an optional best-first list of (score, schedule) pairs,
+    such as the tail of select_best_schedule(..., top_k=K), emitted as ranked
+    runner-up schedules after the main one.
+    """
+    json_schedule = {
+        'schedule_info': {
+            'generated_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'total_courses': len(schedule)
+        },
+        'weekly_schedule': weekly_schedule_to_json(schedule)
+    }
+    
+    if alternatives:
+        json_schedule['alternatives'] = [
+            {
+                'rank': rank,
+                'score': score,
+                'weekly_schedule': weekly_schedule_to_json(alternative)
+            }
+            for rank, (score, alternative) in enumerate(alternatives, start=2)
+        ]
     
     return json_schedule
 
-# Modify the main() function in Algorithm.py
-def main():
+def load_time_preferences(restrictions_path=os.path.join("Schedule Jsons", "time_restrictions.json")):
+    """
+    Build a TimePreference from the time_restrictions.json saved by /restrictions.
+    Raises FileNotFoundError or json.JSONDecodeError if it can't be read.
+    """
+    with open(restrictions_path, 'r') as f:
+        restrictions_data = json.load(f)
+    
+    # Helper function to get time range for a day
+    def get_time_range(day_data):
+        start = day_data['start']
+        end = day_data['end']
+        if start == "0000" and end == "0000":
+            return {'earliest': '0000', 'latest': '2359'}
+        return {'earliest': start, 'latest': end}
+    
+    return TimePreference({
+        'Monday': get_time_range(restrictions_data['monday']),
+        'Tuesday': get_time_range(restrictions_data['tuesday']),
+        'Wednesday': get_time_range(restrictions_data['wednesday']),
+        'Thursday': get_time_range(restrictions_data['thursday']),
+        'Friday': get_time_range(restrictions_data['friday'])
+    })
+
+def load_scoring_objective(objective_path=os.path.join("Schedule Jsons", "scoring_objective.json")):
+    """
+    The ScoringObjective saved by /restrictions, or DEFAULT_OBJECTIVE when
+    none was submitted. A file that can't be read or compiled is logged and
+    the default used instead.
+    """
+    try:
+        with open(objective_path, 'r') as f:
+            return ScoringObjective(json.load(f))
+    except FileNotFoundError:
+        return DEFAULT_OBJECTIVE
+    except (json.JSONDecodeError, ValueError):
+        log_error("Invalid scoring objective, using the default", traceback.format_exc())
+        return DEFAULT_OBJECTIVE
+
+class ScheduleError(Exception):
+    """Base class for the reasons generate_schedule can fail."""
+
+class CourseDataError(ScheduleError):
+    """combined_courses.json is missing or can't be parsed."""
+
+class InvalidScheduleRequest(ScheduleError):
+    """
+    The request can't be satisfied (see validate_schedule_possibility);
+    errors holds the structured validation errors for validity.json.
+    """
+    
+    def __init__(self, errors):
+        super().__init__("Cannot create valid schedule: " +
+                         " ".join(error['message'] for error in errors))
+        self.errors = errors
+
+class NoScheduleFound(ScheduleError):
+    """The search finished without finding a conflict-free schedule."""
+
+class ScheduleResult:
+    """
+    A generated schedule: schedule_json is what generated_schedule.json holds,
+    search is the SearchResult behind it.
+    """
+    
+    def __init__(self, schedule_json, search, objective):
+        self.schedule_json = schedule_json
+        self.search = search
+        self.objective = objective
+    
+    @property
+    def optimal(self):
+        return self.search.optimal
+    
+    @property
+    def stats(self):
+        return self.search.stats
+
+def load_schedule_request(schedule_dir="Schedule Jsons"):
+    """
+    Load the saved course catalog, time restrictions and scoring objective as
+    (catalog, time_preferences, objective). Missing restrictions or
+    objective fall back to the defaults; bad course data raises CourseDataError.
+    """
+    try:
+        catalog = load_catalog(os.path.join(schedule_dir, "combined_courses.json"))
+    except FileNotFoundError:
+        raise CourseDataError("combined_courses.json not found") from None
+    except json.JSONDecodeError:
+        raise CourseDataError("Error parsing combined_courses.json") from None
+    
+    try:
+        time_prefs = load_time_preferences(os.path.join(schedule_dir, "time_restrictions.json"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        time_prefs = TimePreference()
+    
+    objective = load_scoring_objective(os.path.join(schedule_dir, "scoring_objective.json"))
+    return catalog, time_prefs, objective
+
+def load_schedule_inputs(schedule_dir="Schedule Jsons"):
+    """
+    Like load_schedule_request, but with the catalog's course data:
+    (course_data, time_preferences, objective).
+    """
+    catalog, time_prefs, objective = load_schedule_request(schedule_dir)
+    return catalog.courses, time_prefs, objective
+
+def generate_schedule(course_data, time_preferences=None, objective=None, top_k=TOP_K_SCHEDULES,
+                      time_budget=SEARCH_TIME_BUDGET, on_improvement=None):
+    """
+    Validate, search and format a schedule without touching the filesystem.
+    Returns a ScheduleResult; raises InvalidScheduleRequest when validation
+    fails and NoScheduleFound when the search comes back empty.
+    on_improvement(score, schedule) sees each better schedule as the search
+    finds it, before the final result is ready.
+    """
+    objective = objective or DEFAULT_OBJECTIVE
+    
+    is_valid, error_list = validate_schedule_possibility(course_data, time_preferences)
+    if not is_valid:
+        raise InvalidScheduleRequest(error_list)
+    
+    result = run_schedule_search(course_data, time_preferences, top_k=top_k,
+                                 time_budget=time_budget, objective=objective,
+                                 on_improvement=on_improvement)
+    if not result.best_schedule:
+        raise NoScheduleFound("Could not generate a valid schedule with the given constraints")
+    
+    json_schedule = schedule_to_json(result.best_schedule, alternatives=result.schedules[1:])
+    json_schedule['schedule_info']['score'] = result.best_score
+    json_schedule['schedule_info']['optimal'] = result.optimal
+    json_schedule['schedule_info']['search_stats'] = result.stats.as_dict()
+    json_schedule['schedule_info']['objective'] = objective.spec
+    return ScheduleResult(json_schedule, result, objective)
+
+def save_schedule_json(json_schedule, schedule_dir="Schedule Jsons"):
+    """Write a schedule to generated_schedule.json and return its path."""
+    os.makedirs(schedule_dir, exist_ok=True)
+    schedule_path = os.path.join(schedule_dir, "generated_schedule.json")
+    with open(schedule_path, 'w') as f:
+        json.dump(json_schedule, f, indent=2)
+    return schedule_path
+
+def main(schedule_dir="Schedule Jsons", validation_dir="validation"):
     """
     Main function to run the scheduling algorithm.
     Returns None and logs error if schedule cannot be generated.
@@ -416,70 +1277,33 @@ def main():
         print("Starting schedule generation...")
         ensure_directories()
         
-        # Load course data
         try:
-            combined_courses_path = os.path.join("Schedule Jsons", "combined_courses.json")
-            with open(combined_courses_path, 'r') as f:
-                course_data = json.load(f)
+            course_data, time_prefs, objective = load_schedule_inputs(schedule_dir)
             print("Successfully loaded course data")
-        except FileNotFoundError:
-            log_error("combined_courses.json not found", traceback.format_exc())
-            return None
-        except json.JSONDecodeError:
-            log_error("Error parsing combined_courses.json", traceback.format_exc())
+        except CourseDataError as e:
+            log_error(str(e), traceback.format_exc())
             return None
 
-        # Load time restrictions if provided
+        print("Generating optimal schedule...")
         try:
-            restrictions_path = os.path.join("Schedule Jsons", "time_restrictions.json")
-            with open(restrictions_path, 'r') as f:
-                restrictions_data = json.load(f)
-                
-                # Helper function to get time range for a day
-                def get_time_range(day_data):
-                    start = day_data['start']
-                    end = day_data['end']
-                    if start == "0000" and end == "0000":
-                        return {'earliest': '0000', 'latest': '2359'}
-                    return {'earliest': start, 'latest': end}
-                
-                time_prefs = TimePreference({
-                    'Monday': get_time_range(restrictions_data['monday']),
-                    'Tuesday': get_time_range(restrictions_data['tuesday']),
-                    'Wednesday': get_time_range(restrictions_data['wednesday']),
-                    'Thursday': get_time_range(restrictions_data['thursday']),
-                    'Friday': get_time_range(restrictions_data['friday'])
-                })
-                print("Successfully loaded time restrictions")
-        except (FileNotFoundError, json.JSONDecodeError):
-            time_prefs = TimePreference()
-            print("No time restrictions found, using default preferences")
-
-        # Validate schedule possibility
-        is_valid, error_list = validate_schedule_possibility(course_data, time_prefs)
-        if not is_valid:
-            log_validity_errors(error_list)  # Directly pass the list
+            result = generate_schedule(course_data, time_prefs, objective)
+        except InvalidScheduleRequest as e:
+            log_validity_errors(e.errors, validation_dir)
             return None
-        print("Schedule validation successful")
-
-        # Generate schedule
-        print("Generating optimal schedule...")
-        schedule = select_best_schedule(course_data, time_prefs)
-        if not schedule:
-            log_error("Schedule generation failed", 
-                     "Could not generate a valid schedule with the given constraints")
+        except NoScheduleFound as e:
+            log_error("Schedule generation failed", str(e))
             return None
-        print("Successfully generated schedule")
+        if result.optimal:
+            print("Successfully generated schedule")
+        else:
+            print(f"Search budget of {SEARCH_TIME_BUDGET}s ran out, using the best schedule found")
 
-        # Convert schedule to JSON and save
+        # Save the schedule JSON
         try:
-            json_schedule = schedule_to_json(schedule)
-            schedule_path = os.path.join("Schedule Jsons", "generated_schedule.json")
-            with open(schedule_path, 'w') as f:
-                json.dump(json_schedule, f, indent=2)
+            save_schedule_json(result.schedule_json, schedule_dir)
             print("Successfully saved generated schedule to JSON")
             
-            return json_schedule
+            return result.schedule_json
         except Exception as e:
             log_error("Error saving generated schedule", traceback.format_exc())
             return None
@@ -489,4 +1313,7 @@ def main():
         return None
 
 if __name__ == "__main__":
-    main()
+    if "--compare-heuristics" in sys.argv[1:]:
+        print_heuristic_comparison()
+    else:
+        main()
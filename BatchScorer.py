@@ -0,0 +1,127 @@
+import heapq
+import itertools
+
+import numpy as np
+
+from Algorithm import DEFAULT_OBJECTIVE
+from SessionModel import DAY_INDEX, DAYS_OF_WEEK, Session, convert_time_to_minutes
+
+# Schedules are encoded as two boolean tensors of shape
+# (schedules, days, time slots): one marks the slot each session starts in,
+# the other the slot it ends in. The slots are the distinct start and end
+# minutes of the batch, so gaps stay exact to the minute (including
+# back-to-back sessions sharing a boundary) while the time axis stays short.
+WEEKDAYS = DAYS_OF_WEEK[:5]
+
+# Schedules scored per batch
+DEFAULT_CHUNK_SIZE = 2048
+
+DAY_BITS = 1 << np.arange(len(DAYS_OF_WEEK))
+
+def schedule_marker_tensors(schedules):
+    """
+    Encode schedules (each a list of sessions, as calculate_schedule_score
+    takes them) as (starts, ends, minutes) where minutes holds the minute of
+    day of each time slot.
+    """
+    # Schedules in a batch share most of their sections; parse each once
+    parsed = {}
+    rows, days, begins, finishes = [], [], [], []
+    for row, sessions in enumerate(schedules):
+        for session in sessions:
+            times = parsed.get(id(session))
+            if times is None:
+                if isinstance(session, Session):
+                    times = (session.day_indices, session.begin, session.end)
+                else:
+                    times = (tuple(DAY_INDEX[day] for day in session['daysOfWeek']),
+                             convert_time_to_minutes(session['beginTime']),
+                             convert_time_to_minutes(session['endTime']))
+                parsed[id(session)] = times
+            day_indices, begin, end = times
+            for day_index in day_indices:
+                rows.append(row)
+                days.append(day_index)
+                begins.append(begin)
+                finishes.append(end)
+
+    minutes, slot_indices = np.unique(np.array(begins + finishes, dtype=np.int32), return_inverse=True)
+    starts = np.zeros((len(schedules), len(DAYS_OF_WEEK), len(minutes)), dtype=bool)
+    ends = np.zeros_like(starts)
+    starts[rows, days, slot_indices[:len(begins)]] = True
+    ends[rows, days, slot_indices[len(begins):]] = True
+    return starts, ends, minutes
+
+def gap_scores(gaps, objective=None):
+    """ScoringObjective.gap_score over an array of gaps."""
+    gap_table = np.append(np.array((objective or DEFAULT_OBJECTIVE).gap_table, dtype=float), 0)
+    return gap_table[np.clip(gaps, 0, len(gap_table) - 1)]
+
+def score_marker_tensors(starts, ends, minutes, objective=None):
+    """
+    calculate_schedule_score for every schedule in a set of marker tensors,
+    under objective (a ScoringObjective, DEFAULT_OBJECTIVE if None).
+    Schedules must be conflict-free, as the search produces them; results
+    match the per-schedule function up to float rounding.
+    """
+    objective = objective or DEFAULT_OBJECTIVE
+
+    # For every start, the latest end at or before it is the previous
+    # session's end, so the gap is the distance between the two
+    weekday_starts = starts[:, :len(WEEKDAYS)]
+    weekday_ends = ends[:, :len(WEEKDAYS)]
+    last_end = np.maximum.accumulate(np.where(weekday_ends, minutes, -1), axis=2)
+    has_gap = weekday_starts & (last_end >= 0)
+    gaps = minutes - last_end
+
+    num_gaps = has_gap.sum(axis=(1, 2))
+    small_gaps = (has_gap & (gaps < objective.small_gap)).sum(axis=(1, 2))
+    total_gap_score = np.where(has_gap, gap_scores(gaps, objective), 0).sum(axis=(1, 2))
+    gap_score = total_gap_score / np.maximum(num_gaps, 1)
+
+    day_counts = starts.sum(axis=2)
+    day_score = day_counts @ np.array(objective.day_weights)
+
+    # Empty-day and concentration bonuses come from the objective's table
+    day_masks = (day_counts > 0) @ DAY_BITS
+    day_bonus = np.array(objective.day_mask_bonus)[day_masks]
+
+    tight_schedule_bonus = np.where(small_gaps * 2 > num_gaps, objective.tight_schedule_bonus, 0)
+
+    scores = gap_score + day_score * 100 + day_bonus + tight_schedule_bonus
+    # An empty schedule scores 0, as in calculate_schedule_score
+    return np.where(day_counts.any(axis=1), scores, 0.0)
+
+def score_schedules(schedules, objective=None):
+    """Score a list of schedules in one batch; returns a float array."""
+    if not schedules:
+        return np.zeros(0)
+    return score_marker_tensors(*schedule_marker_tensors(schedules), objective)
+
+def iter_scored_chunks(schedules, chunk_size=DEFAULT_CHUNK_SIZE, objective=None):
+    """Score any iterable of schedules chunk by chunk, yielding (chunk, scores)."""
+    schedules = iter(schedules)
+    while True:
+        chunk = list(itertools.islice(schedules, chunk_size))
+        if not chunk:
+            return
+        yield chunk, score_schedules(chunk, objective)
+
+def rank_schedules(schedules, top_k=1, chunk_size=DEFAULT_CHUNK_SIZE, objective=None):
+    """
+    Best top_k schedules of an iterable (for example
+    timeschedule.iter_conflict_free_schedules) as (score, schedule) pairs,
+    best first. Only one chunk and the top_k are held in memory.
+    """
+    best = []
+    counter = itertools.count()
+    for chunk, scores in iter_scored_chunks(schedules, chunk_size, objective):
+        # Only the chunk's own top_k can make it into the overall top_k
+        candidates = np.argsort(scores)[::-1][:top_k]
+        for index in candidates:
+            entry = (float(scores[index]), -next(counter), chunk[index])
+            if len(best) < top_k:
+                heapq.heappush(best, entry)
+            elif entry[0] > best[0][0]:
+                heapq.heapreplace(best, entry)
+    return [(score, schedule) for score, _, schedule in sorted(best, reverse=True)]
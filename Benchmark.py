@@ -0,0 +1,191 @@
+import argparse
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from datetime import datetime
+
+import Algorithm
+import BatchScorer
+import timeschedule
+
+# Ontario Tech style meeting blocks and lengths (minutes)
+START_TIMES = ['0810', '0940', '1110', '1240', '1410', '1540', '1710', '1840']
+SESSION_MINUTES = {'LEC': 80, 'LAB': 170, 'TUT': 50}
+LECTURE_DAY_PAIRS = [('Monday', 'Wednesday'), ('Tuesday', 'Thursday'), ('Wednesday', 'Friday')]
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+
+def minutes_to_time(minutes):
+    return f"{minutes // 60:02d}{minutes % 60:02d}"
+
+def generate_catalog(seed=0, courses=5, sections_per_type=4, lab_ratio=0.6, tut_ratio=0.5, density=0.5):
+    """
+    Build a synthetic combined_courses.json-style catalog.
+    Every course has a lecture; lab_ratio and tut_ratio are the chances that
+    it also has labs and tutorials. sections_per_type is the number of
+    sections of each type. density (0-1] squeezes start times into fewer
+    blocks, so higher values mean more overlapping sections.
+    The same arguments always produce the same catalog.
+    """
+    rng = random.Random(seed)
+    blocks = START_TIMES[:max(1, round(len(START_TIMES) * (1 - density)) + 1)]
+    catalog = {}
+    crn = 10000
+
+    for index in range(courses):
+        course_code = f"SYN{1000 + index}U"
+        session_types = ['LEC']
+        if rng.random() < lab_ratio:
+            session_types.append('LAB')
+        if rng.random() < tut_ratio:
+            session_types.append('TUT')
+
+        sessions = []
+        for session_type in session_types:
+            for _ in range(sections_per_type):
+                crn += 1
+                begin = rng.choice(blocks)
+                begin_minutes = int(begin[:2]) * 60 + int(begin[2:])
+                if session_type == 'LEC':
+                    days = list(rng.choice(LECTURE_DAY_PAIRS))
+                else:
+                    days = [rng.choice(WEEKDAYS)]
+
+                sessions.append({
+                    "displayName": f"Professor, {rng.choice('ABCDEFGH')}",
+                    "startdate": "01/06/2025",
+                    "building": rng.choice(["Shawenjigewining Hall", "Science Building"]),
+                    "enddate": "04/04/2025",
+                    "campus": "North Oshawa",
+                    "room": str(rng.randint(100, 400)),
+                    "courseReferenceNumber": str(crn),
+                    "meetingScheduleType": session_type,
+                    "beginTime": begin,
+                    "endTime": minutes_to_time(begin_minutes + SESSION_MINUTES[session_type]),
+                    "hoursWeek": SESSION_MINUTES[session_type] * len(days) / 60,
+                    "daysOfWeek": days
+                })
+        catalog[course_code] = sessions
+
+    return catalog
+
+def run_branch_and_bound(catalog):
+    """Algorithm.run_schedule_search; returns (found, nodes explored)."""
+    result = Algorithm.run_schedule_search(catalog)
+    return bool(result.schedules), result.stats.nodes
+
+def run_brute_force(catalog):
+    """timeschedule.find_best_schedule; returns (found, nodes explored)."""
+    stats = {}
+    found = timeschedule.find_best_schedule(catalog, stats=stats) is not None
+    return found, stats.get('nodes', 0)
+
+def run_batch_enumeration(catalog):
+    """
+    Every conflict-free schedule scored in NumPy batches by BatchScorer, under
+    the same objective as the branch and bound; returns (found, nodes explored).
+    """
+    stats = {}
+    slots = timeschedule.build_schedule_slots(catalog)
+    ranked = BatchScorer.rank_schedules(timeschedule.iter_conflict_free_schedules(slots, stats))
+    return bool(ranked), stats.get('nodes', 0)
+
+# name -> (runner, largest course count it is run at)
+SOLVERS = {
+    'branch_and_bound': (run_branch_and_bound, None),
+    'brute_force': (run_brute_force, 6),
+    'batch_enumeration': (run_batch_enumeration, 6),
+}
+
+# (courses, sections per type) pairs benchmarked by default
+DEFAULT_SIZES = [(3, 3), (4, 4), (5, 4), (6, 5), (7, 5)]
+
+def measure(runner, catalog, repeat):
+    """Median runtime over repeat runs, then one traced run for peak memory."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        found, nodes = runner(catalog)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    try:
+        runner(catalog)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'found': found,
+        'nodes': nodes,
+        'median_seconds': round(statistics.median(timings), 5),
+        'min_seconds': round(min(timings), 5),
+        'peak_memory_kb': round(peak / 1024, 1)
+    }
+
+def run_benchmarks(sizes=None, solvers=None, seed=0, repeat=3, lab_ratio=0.6, tut_ratio=0.5, density=0.5):
+    """Run every selected solver on a generated catalog of every size."""
+    rows = []
+    for courses, sections_per_type in sizes or DEFAULT_SIZES:
+        catalog = generate_catalog(seed, courses, sections_per_type, lab_ratio, tut_ratio, density)
+        for name in solvers or SOLVERS:
+            runner, max_courses = SOLVERS[name]
+            if max_courses is not None and courses > max_courses:
+                continue
+            row = {'solver': name, 'courses': courses, 'sections_per_type': sections_per_type}
+            row.update(measure(runner, catalog, repeat))
+            rows.append(row)
+    return rows
+
+def print_report(rows):
+    print(f"{'Solver':<18}{'Courses':>8}{'Sect/type':>10}{'Found':>7}{'Nodes':>10}"
+          f"{'Median s':>11}{'Peak KB':>10}")
+    print("-" * 74)
+    for row in rows:
+        nodes = row['nodes'] if row['nodes'] is not None else '-'
+        print(f"{row['solver']:<18}{row['courses']:>8}{row['sections_per_type']:>10}"
+              f"{str(row['found']):>7}{nodes:>10}{row['median_seconds']:>11}{row['peak_memory_kb']:>10}")
+
+def parse_sizes(text):
+    """Parse '4x4,6x5' into [(4, 4), (6, 5)]."""
+    sizes = []
+    for item in text.split(','):
+        courses, sections = item.lower().split('x')
+        sizes.append((int(courses), int(sections)))
+    return sizes
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the schedule solvers on synthetic catalogs.")
+    parser.add_argument('--sizes', type=parse_sizes, help="course x sections-per-type list, e.g. 4x4,6x5")
+    parser.add_argument('--solvers', nargs='+', choices=list(SOLVERS), help="solvers to run (default: all)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per case")
+    parser.add_argument('--lab-ratio', type=float, default=0.6)
+    parser.add_argument('--tut-ratio', type=float, default=0.5)
+    parser.add_argument('--density', type=float, default=0.5)
+    parser.add_argument('--output', help="also write the report as JSON to this file")
+    args = parser.parse_args()
+
+    rows = run_benchmarks(args.sizes, args.solvers, args.seed, args.repeat,
+                          args.lab_ratio, args.tut_ratio, args.density)
+    print_report(rows)
+
+    if args.output:
+        report = {
+            'generated_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'settings': {
+                'seed': args.seed,
+                'repeat': args.repeat,
+                'lab_ratio': args.lab_ratio,
+                'tut_ratio': args.tut_ratio,
+                'density': args.density
+            },
+            'results': rows
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -1,74 +1,209 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
 from icalendar import Calendar, Event
 import pytz
+import hashlib
 import json
+import os
 import sys
 from pathlib import Path
 
-def create_ics_from_json(json_data):
-    # Create calendar with minimal required properties
-    cal = Calendar()
-    cal.add('prodid', '-//Test Calendar//EN')
-    cal.add('version', '2.0')
-    cal.add('calscale', 'GREGORIAN')
+TIMEZONE = pytz.timezone('America/Toronto')
+FALLBACK_WEEKS = 12  # Term length assumed when a schedule has no section dates
+
+WEEKDAYS = {
+    'Monday': 0, 'Tuesday': 1, 'Wednesday': 2, 'Thursday': 3,
+    'Friday': 4, 'Saturday': 5, 'Sunday': 6
+}
+ICAL_WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+# Weeks without classes per term code (as in Scrapper.DEFAULT_TERM), each as
+# (first day, last day). Add a term's breaks here when its calendar is published.
+TERM_BREAKS = {
+    '202501': [(date(2025, 2, 17), date(2025, 2, 21))],  # Winter 2025 reading week
+}
+
+def parse_section_date(value):
+    """Parse a scraper date such as '01/06/2025'; None if missing or unreadable."""
+    if not value:
+        return None
+    for date_format in ('%m/%d/%Y', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            pass
+    return None
+
+def fallback_term(json_data):
+    """First and last day of the FALLBACK_WEEKS starting the Monday after the schedule was generated."""
+    generated = datetime.strptime(json_data['schedule_info']['generated_date'], '%Y-%m-%d %H:%M:%S').date()
+    first_day = generated + timedelta(days=-generated.weekday() % 7)
+    return first_day, first_day + timedelta(weeks=FALLBACK_WEEKS, days=-1)
+
+def in_break(day, breaks):
+    return any(first <= day <= last for first, last in breaks)
+
+def breaks_between(first_day, last_day, breaks=TERM_BREAKS):
+    """The breaks of any term that overlap the days from first_day to last_day."""
+    return [(first, last) for term_breaks in breaks.values() for first, last in term_breaks
+            if first <= last_day and last >= first_day]
 
-    # Set timezone
-    tz = pytz.timezone('America/Toronto')
+def recurring_classes(json_data, breaks=TERM_BREAKS):
+    """
+    Group the day-by-day schedule into one weekly recurrence per section meeting.
+    Each recurrence runs from the section's startdate to its enddate and lists
+    its occurrences that fall in one of those dates' breaks as exceptions.
+    Schedules that predate section dates get the fallback term, without
+    breaks since its dates are only a guess. Returns dicts with uid,
+    summary, location, start and end of the first occurrence, byday, until
+    (UTC) and exdates.
+    """
+    meetings = {}
+    for day, classes in json_data['weekly_schedule'].items():
+        for class_info in classes:
+            key = (class_info['course_code'], class_info['crn'], class_info['type'],
+                   class_info['start_time'], class_info['end_time'])
+            meetings.setdefault(key, (class_info, []))[1].append(WEEKDAYS[day])
 
-    # Get the schedule start date (next Monday)
-    schedule_date = datetime.strptime(json_data['schedule_info']['generated_date'], '%Y-%m-%d %H:%M:%S')
-    start_date = schedule_date.date()
-    while start_date.weekday() != 0:  # 0 is Monday
-        start_date += timedelta(days=1)
+    stamp = TIMEZONE.localize(datetime.strptime(json_data['schedule_info']['generated_date'],
+                                                '%Y-%m-%d %H:%M:%S')).astimezone(pytz.utc)
+    fallback = None
+    recurrences = []
+    for class_info, weekdays in meetings.values():
+        first_day = parse_section_date(class_info.get('start_date'))
+        last_day = parse_section_date(class_info.get('end_date'))
+        if first_day is None or last_day is None or last_day < first_day:
+            fallback = fallback or fallback_term(json_data)
+            first_day, last_day = fallback
+            section_breaks = []
+        else:
+            section_breaks = breaks_between(first_day, last_day, breaks)
 
-    # Process each week's schedule for 12 weeks
-    weekday_map = {
-        'Monday': 0, 'Tuesday': 1, 'Wednesday': 2,
-        'Thursday': 3, 'Friday': 4
-    }
+        weekdays = sorted(set(weekdays))
+        class_dates = [first_day + timedelta(days=offset)
+                       for offset in range((last_day - first_day).days + 1)
+                       if (first_day + timedelta(days=offset)).weekday() in weekdays]
+        if not class_dates or all(in_break(day, section_breaks) for day in class_dates):
+            continue
 
-    for week in range(12):  # Repeat for 12 weeks
-        week_start_date = start_date + timedelta(weeks=week)
+        start_time = datetime.strptime(class_info['start_time'], '%I:%M %p').time()
+        end_time = datetime.strptime(class_info['end_time'], '%I:%M %p').time()
+        byday = [ICAL_WEEKDAYS[weekday] for weekday in weekdays]
+        recurrences.append({
+            'uid': f"{class_info['crn']}-{class_info['type']}-{start_time:%H%M}-{''.join(byday)}@hackhive-schedule",
+            'stamp': stamp,
+            'summary': f"{class_info['course_code']} {class_info['type']}",
+            'location': f"{class_info['building']} {class_info['room']}",
+            'start': TIMEZONE.localize(datetime.combine(class_dates[0], start_time)),
+            'end': TIMEZONE.localize(datetime.combine(class_dates[0], end_time)),
+            'byday': byday,
+            # UNTIL has to be UTC when DTSTART carries a time zone
+            'until': TIMEZONE.localize(datetime.combine(last_day, time(23, 59, 59))).astimezone(pytz.utc),
+            'exdates': [TIMEZONE.localize(datetime.combine(day, start_time))
+                        for day in class_dates if in_break(day, section_breaks)]
+        })
+    return recurrences
 
-        for day, classes in json_data['weekly_schedule'].items():
-            if not classes:  # Skip empty days
-                continue
+PRODID = '-//Test Calendar//EN'
+# Bump when stream_ics output changes so cached calendars and ETags are replaced
+ICS_FORMAT_VERSION = 2
+MAX_LINE_OCTETS = 75  # RFC 5545 folds longer content lines
 
-            # Calculate the date for this day's classes in the current week
-            day_offset = weekday_map[day]
-            class_date = week_start_date + timedelta(days=day_offset)
+def escape_text(value):
+    """Escape a TEXT property value (SUMMARY, LOCATION)."""
+    return (str(value).replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\n', '\\n'))
 
-            # Process each class
-            for class_info in classes:
-                event = Event()
+def fold_line(line):
+    """A content line with its CRLF, folded so no physical line exceeds 75 octets."""
+    if len(line.encode('utf-8')) <= MAX_LINE_OCTETS:
+        return line + '\r\n'
+    pieces, current, size = [], '', 0
+    for char in line:
+        char_size = len(char.encode('utf-8'))
+        # Continuation lines start with a space, which counts toward the limit
+        if size + char_size > (MAX_LINE_OCTETS if not pieces else MAX_LINE_OCTETS - 1):
+            pieces.append(current)
+            current, size = '', 0
+        current += char
+        size += char_size
+    pieces.append(current)
+    return '\r\n '.join(pieces) + '\r\n'
 
-                # Parse times
-                start_time = datetime.strptime(class_info['start_time'], '%I:%M %p').time()
-                end_time = datetime.strptime(class_info['end_time'], '%I:%M %p').time()
+def format_local(value):
+    return value.strftime('%Y%m%dT%H%M%S')
 
-                # Create event start and end times
-                start = tz.localize(datetime.combine(class_date, start_time))
-                end = tz.localize(datetime.combine(class_date, end_time))
+def format_utc(value):
+    return value.strftime('%Y%m%dT%H%M%SZ')
 
-                # Add basic event details
-                event.add('summary', f"{class_info['course_code']} {class_info['type']}")
-                event.add('dtstart', start)
-                event.add('dtend', end)
-                event.add('location', f"{class_info['building']} {class_info['room']}")
+def stream_ics(json_data, breaks=TERM_BREAKS):
+    """
+    Serialize the schedule's calendar directly as iCalendar text, one chunk
+    per event, without building an icalendar object tree. Produces the same
+    events as create_ics_from_json.
+    """
+    yield ''.join(fold_line(line) for line in (
+        'BEGIN:VCALENDAR', 'VERSION:2.0', f'PRODID:{PRODID}', 'CALSCALE:GREGORIAN'))
 
-                # Add to calendar
-                cal.add_component(event)
+    tzid = TIMEZONE.zone
+    for recurrence in recurring_classes(json_data, breaks):
+        lines = [
+            'BEGIN:VEVENT',
+            f"SUMMARY:{escape_text(recurrence['summary'])}",
+            f"DTSTART;TZID={tzid}:{format_local(recurrence['start'])}",
+            f"DTEND;TZID={tzid}:{format_local(recurrence['end'])}",
+            f"DTSTAMP:{format_utc(recurrence['stamp'])}",
+            f"UID:{escape_text(recurrence['uid'])}",
+            f"RRULE:FREQ=WEEKLY;UNTIL={format_utc(recurrence['until'])};BYDAY={','.join(recurrence['byday'])}"
+        ]
+        if recurrence['exdates']:
+            lines.append(f"EXDATE;TZID={tzid}:{','.join(format_local(day) for day in recurrence['exdates'])}")
+        lines.append(f"LOCATION:{escape_text(recurrence['location'])}")
+        lines.append('END:VEVENT')
+        yield ''.join(fold_line(line) for line in lines)
+
+    yield fold_line('END:VCALENDAR')
+
+def calendar_etag(schedule_source, breaks=TERM_BREAKS):
+    """
+    Content hash identifying the calendar for the raw bytes of a
+    generated_schedule.json, usable as a cache key and ETag.
+    """
+    digest = hashlib.sha256(f"{ICS_FORMAT_VERSION}|{breaks!r}|".encode('utf-8'))
+    digest.update(schedule_source)
+    return digest.hexdigest()[:32]
+
+def create_ics_from_json(json_data, breaks=TERM_BREAKS):
+    # Create calendar with minimal required properties
+    cal = Calendar()
+    cal.add('prodid', PRODID)
+    cal.add('version', '2.0')
+    cal.add('calscale', 'GREGORIAN')
+
+    # One weekly recurring event per section meeting instead of an event per class
+    for recurrence in recurring_classes(json_data, breaks):
+        event = Event()
+        event.add('uid', recurrence['uid'])
+        event.add('dtstamp', recurrence['stamp'])
+        event.add('summary', recurrence['summary'])
+        event.add('dtstart', recurrence['start'])
+        event.add('dtend', recurrence['end'])
+        event.add('rrule', {'freq': 'weekly', 'byday': recurrence['byday'], 'until': recurrence['until']})
+        if recurrence['exdates']:
+            event.add('exdate', recurrence['exdates'])
+        event.add('location', recurrence['location'])
+        cal.add_component(event)
 
     return cal
 
-def main():
+def main(schedule_dir=None):
     try:
-        # Get script directory
-        script_dir = Path(__file__).parent
-        schedule_dir = script_dir / "Schedule Jsons"
+        # Default to the SCHEDULE_DIR workspace, or Schedule Jsons next to this script
+        if schedule_dir is None:
+            schedule_dir = os.environ.get("SCHEDULE_DIR") or Path(__file__).parent / "Schedule Jsons"
+        schedule_dir = Path(schedule_dir)
         
         # Create directory if it doesn't exist
-        schedule_dir.mkdir(exist_ok=True)
+        schedule_dir.mkdir(parents=True, exist_ok=True)
         
         # Find and process JSON file
         json_file = schedule_dir / 'generated_schedule.json'
@@ -80,13 +215,10 @@ def main():
         with open(json_file, 'r', encoding='utf-8') as f:
             schedule_data = json.load(f)
         
-        # Create calendar
-        calendar = create_ics_from_json(schedule_data)
-        
-        # Save ICS file
+        # Write the calendar as it is serialized
         output_path = schedule_dir / 'schedule.ics'
-        with open(output_path, 'wb') as f:
-            f.write(calendar.to_ical())
+        with open(output_path, 'w', encoding='utf-8', newline='') as f:
+            f.writelines(stream_ics(schedule_data))
         
         print(f"Calendar created successfully at {output_path}")
         
@@ -0,0 +1,107 @@
+import contextlib
+import json
+import os
+import sqlite3
+import time
+
+# Outside "Schedule Jsons" so /clear-directories doesn't wipe it
+DEFAULT_CACHE_PATH = os.path.join("cache", "courses.sqlite3")
+
+FRESH_TTL = 15 * 60        # Seconds an entry is served without refetching
+STALE_TTL = 24 * 60 * 60   # Seconds a stale entry may still be served while it is refetched
+MAX_ENTRIES = 500          # Least recently used entries beyond this are evicted
+
+# Entry states returned by CourseCache.get
+FRESH = 'fresh'
+STALE = 'stale'
+
+class CourseCache:
+    """
+    SQLite cache of extract_meeting_info output keyed by (course code, term).
+    Entries younger than fresh_ttl are FRESH. Entries younger than stale_ttl
+    are STALE: still usable, but the caller should refetch them (in the
+    background where it can). Older entries count as missing. The cache
+    holds at most max_entries, dropping the least recently used.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, fresh_ttl=FRESH_TTL, stale_ttl=STALE_TTL,
+                 max_entries=MAX_ENTRIES):
+        self.path = path
+        self.fresh_ttl = fresh_ttl
+        self.stale_ttl = max(stale_ttl, fresh_ttl)
+        self.max_entries = max_entries
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with contextlib.closing(self._connect()) as connection:
+            with connection:
+                connection.execute("""
+                    CREATE TABLE IF NOT EXISTS courses (
+                        course_code TEXT NOT NULL,
+                        term TEXT NOT NULL,
+                        data TEXT NOT NULL,
+                        fetched_at REAL NOT NULL,
+                        last_used REAL NOT NULL,
+                        PRIMARY KEY (course_code, term)
+                    )
+                """)
+                connection.execute("CREATE INDEX IF NOT EXISTS courses_last_used ON courses (last_used)")
+
+    def _connect(self):
+        # A connection per call keeps the cache safe to share between threads
+        return sqlite3.connect(self.path, timeout=10)
+
+    def get(self, course_code, term):
+        """Return (sessions, FRESH or STALE), or None when missing or expired."""
+        now = time.time()
+        with contextlib.closing(self._connect()) as connection:
+            with connection:
+                row = connection.execute(
+                    "SELECT data, fetched_at FROM courses WHERE course_code = ? AND term = ?",
+                    (course_code, term)
+                ).fetchone()
+                if row is None:
+                    return None
+
+                data, fetched_at = row
+                age = now - fetched_at
+                if age >= self.stale_ttl:
+                    return None
+                connection.execute(
+                    "UPDATE courses SET last_used = ? WHERE course_code = ? AND term = ?",
+                    (now, course_code, term)
+                )
+        return json.loads(data), FRESH if age < self.fresh_ttl else STALE
+
+    def put(self, course_code, term, sessions):
+        """Store freshly fetched sessions for a course and evict beyond max_entries."""
+        now = time.time()
+        with contextlib.closing(self._connect()) as connection:
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO courses (course_code, term, data, fetched_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (course_code, term, json.dumps(sessions), now, now)
+                )
+                connection.execute(
+                    "DELETE FROM courses WHERE rowid IN ("
+                    "SELECT rowid FROM courses ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,)
+                )
+
+    def invalidate(self, course_code=None, term=None):
+        """Drop one course, one term, or (with no arguments) everything."""
+        query = "DELETE FROM courses"
+        conditions, values = [], []
+        if course_code is not None:
+            conditions.append("course_code = ?")
+            values.append(course_code)
+        if term is not None:
+            conditions.append("term = ?")
+            values.append(term)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        with contextlib.closing(self._connect()) as connection:
+            with connection:
+                connection.execute(query, values)
@@ -1,34 +1,63 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context
 from flask_cors import CORS
 import subprocess
 import json
 import os
 import traceback
 import datetime
-import shutil
-from CalendarConverterICS import create_ics_from_json
+import threading
+from collections import OrderedDict
+import requests
+from CalendarConverterICS import stream_ics, calendar_etag
+import Algorithm
+from Algorithm import ScoringObjective
+from JobQueue import JobQueue, JobAlreadyRunning
+from ResultCache import ScheduleResultCache
+from Workspace import Workspace, InvalidSession, SESSION_HEADER, remove_stale_workspaces
 
 app = Flask(__name__)
 CORS(app)
 
-# Folder where JSON and ICS files are stored
-SCHEDULE_FOLDER = 'Schedule Jsons'
-VALIDATION_FOLDER = 'validation'
-
-# Ensure the folder exists
-if not os.path.exists(SCHEDULE_FOLDER):
-    os.makedirs(SCHEDULE_FOLDER)
-if not os.path.exists(VALIDATION_FOLDER):
-    os.makedirs(VALIDATION_FOLDER)
+# Shared folders used by requests that don't send a session ID
+Workspace().ensure()
 
 # Constants for file paths
 TIME_RESTRICTIONS_FILE = 'time_restrictions.json'
+COMBINED_COURSES_FILE = 'combined_courses.json'
+SCORING_OBJECTIVE_FILE = 'scoring_objective.json'
 GENERATED_STRUCTURES_FILE = 'generated_structures.json'
 
+# /courses pipelines run in the background on this many threads. Each job
+# works in its session's own workspace, so they no longer step on each other.
+PIPELINE_WORKERS = 4
+job_queue = JobQueue(PIPELINE_WORKERS)
+
+# Optimal schedules already generated, so repeated course sets skip the search
+result_cache = ScheduleResultCache()
+
+# Serialized calendars by calendar_etag, least recently used first
+CALENDAR_CACHE_ENTRIES = 64
+calendar_cache = OrderedDict()
+calendar_cache_lock = threading.Lock()
+
+# Persistent scraper started with `python ScraperService.py`
+SCRAPER_SERVICE_URL = 'http://127.0.0.1:5001'
+# Connect quickly, but a lookup may wait on a manual login
+SCRAPER_SERVICE_TIMEOUT = (3, None)
+
+def request_workspace():
+    """The workspace of the session named by the X-Session-Id header (or session_id query parameter)"""
+    session_id = request.headers.get(SESSION_HEADER) or request.args.get('session_id')
+    return Workspace(session_id)
+
+@app.errorhandler(InvalidSession)
+def handle_invalid_session(e):
+    return jsonify({"error": str(e)}), 400
+
 @app.route('/get-validation', methods=['GET'])
 def get_validation():
     """Check if validity.json exists and return its contents."""
-    validation_file = os.path.join(VALIDATION_FOLDER, "validity.json")
+    validation_file = request_workspace().validation_path("validity.json")
 
     if os.path.exists(validation_file):
         with open(validation_file, 'r') as f:
@@ -39,30 +68,11 @@ def get_validation():
 
 @app.route('/clear-directories', methods=['POST'])
 def clear_directories():
+    """Clear the calling session's workspace, and drop workspaces abandoned long ago"""
+    workspace = request_workspace()
     try:
-        # Clear Schedule Jsons directory
-        if os.path.exists(SCHEDULE_FOLDER):
-            for filename in os.listdir(SCHEDULE_FOLDER):
-                file_path = os.path.join(SCHEDULE_FOLDER, filename)
-                try:
-                    if os.path.isfile(file_path):
-                        os.unlink(file_path)
-                    elif os.path.isdir(file_path):
-                        shutil.rmtree(file_path)
-                except Exception as e:
-                    print(f"Error deleting {file_path}: {e}")
-
-        # Clear validation directory
-        if os.path.exists(VALIDATION_FOLDER):
-            for filename in os.listdir(VALIDATION_FOLDER):
-                file_path = os.path.join(VALIDATION_FOLDER, filename)
-                try:
-                    if os.path.isfile(file_path):
-                        os.unlink(file_path)
-                    elif os.path.isdir(file_path):
-                        shutil.rmtree(file_path)
-                except Exception as e:
-                    print(f"Error deleting {file_path}: {e}")
+        workspace.clear()
+        remove_stale_workspaces()
 
         return jsonify({"message": "Directories cleared successfully"}), 200
     except Exception as e:
@@ -85,8 +95,11 @@ def log_error(error_message):
 
 @app.route('/list-schedules', methods=['GET'])
 def list_schedules():
+    schedule_dir = request_workspace().schedule_dir
     try:
-        files = [f for f in os.listdir(SCHEDULE_FOLDER) if f.endswith('.json') or f.endswith('.ics')]
+        if not os.path.exists(schedule_dir):
+            return jsonify({"files": []})
+        files = [f for f in os.listdir(schedule_dir) if f.endswith('.json') or f.endswith('.ics')]
         return jsonify({"files": files})
     except Exception as e:
         error_trace = traceback.format_exc()
@@ -95,8 +108,9 @@ def list_schedules():
 
 @app.route('/get-schedule/<filename>', methods=['GET'])
 def get_schedule(filename):
+    workspace = request_workspace()
     try:
-        file_path = os.path.join(SCHEDULE_FOLDER, filename)
+        file_path = workspace.schedule_path(filename)
         if not os.path.exists(file_path):
             return jsonify({"error": "File not found"}), 404
         
@@ -121,38 +135,36 @@ def get_schedule(filename):
 
 @app.route('/convert-calendar', methods=['GET'])
 def convert_calendar():
+    """
+    Stream the session's schedule as an .ics file. The calendar is cached and
+    tagged by the content hash of generated_schedule.json, so repeat downloads
+    are served from memory, or answered 304 when the browser has it already.
+    """
+    workspace = request_workspace()
     try:
-        # Ensure the folder exists
-        if not os.path.exists(SCHEDULE_FOLDER):
-            os.makedirs(SCHEDULE_FOLDER)
-
-        generated_schedule_path = os.path.join(SCHEDULE_FOLDER, 'generated_schedule.json')
+        generated_schedule_path = workspace.schedule_path('generated_schedule.json')
         if not os.path.exists(generated_schedule_path):
             return jsonify({"error": "Schedule data not found"}), 404
 
-        with open(generated_schedule_path, 'r') as f:
-            schedule_data = json.load(f)
-
-        calendar = create_ics_from_json(schedule_data)
-        output_filename = os.path.join(SCHEDULE_FOLDER, 'schedule.ics')
-
-        # Write the calendar file
-        with open(output_filename, 'wb') as f:
-            f.write(calendar.to_ical())
-
-        # Verify file was created and has content
-        if not os.path.exists(output_filename) or os.path.getsize(output_filename) == 0:
-            return jsonify({"error": "Failed to create calendar file"}), 500
-
-        # Return the file path for immediate download
-        response = send_file(
-            output_filename,
-            mimetype='text/calendar',
-            as_attachment=True,
-            download_name='schedule.ics'
-        )
-        response.headers['Content-Type'] = 'text/calendar; charset=utf-8'
-        response.headers['Content-Disposition'] = 'attachment; filename=schedule.ics'
+        with open(generated_schedule_path, 'rb') as f:
+            schedule_source = f.read()
+        etag = calendar_etag(schedule_source)
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            calendar = cached_calendar(etag)
+            if calendar is not None:
+                chunks = [calendar]
+            else:
+                chunks = cache_calendar_chunks(etag, stream_ics(json.loads(schedule_source)))
+            response = Response(stream_with_context(chunks), mimetype='text/calendar')
+            response.headers['Content-Type'] = 'text/calendar; charset=utf-8'
+            response.headers['Content-Disposition'] = 'attachment; filename=schedule.ics'
+
+        response.set_etag(etag)
+        # Let browsers keep the file but check the ETag before reusing it
+        response.headers['Cache-Control'] = 'no-cache'
         return response
 
     except Exception as e:
@@ -160,49 +172,162 @@ def convert_calendar():
         log_error(error_trace)
         return jsonify({"error": str(e)}), 500
 
+def cached_calendar(etag):
+    with calendar_cache_lock:
+        calendar = calendar_cache.get(etag)
+        if calendar is not None:
+            calendar_cache.move_to_end(etag)
+        return calendar
+
+def cache_calendar_chunks(etag, chunks):
+    """Pass the chunks through, caching the whole calendar once it was streamed completely"""
+    streamed = []
+    for chunk in chunks:
+        streamed.append(chunk)
+        yield chunk
+    with calendar_cache_lock:
+        calendar_cache[etag] = ''.join(streamed)
+        while len(calendar_cache) > CALENDAR_CACHE_ENTRIES:
+            calendar_cache.popitem(last=False)
+
 @app.route('/courses', methods=['POST'])
 def handle_courses():
+    """Queue the scrape, schedule and summaries pipeline and return its job ID"""
+    workspace = request_workspace()
     try:
-        data = request.get_json()
+        data = request.get_json() or {}
         courses = data.get('courses', [])
+        if not courses:
+            return jsonify({"error": "No courses provided"}), 400
         
+        job = job_queue.submit(run_course_pipeline, courses, workspace.ensure(), key=workspace.schedule_dir)
+        return jsonify(job_links(job)), 202
+    except JobAlreadyRunning as e:
+        return job_conflict(e.job)
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        log_error(error_trace)
+        return jsonify({"error": str(e)}), 500
+
+def job_links(job):
+    return {
+        "job_id": job.id,
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events"
+    }
+
+def job_conflict(job):
+    """409 for a session that already has a job writing to its workspace"""
+    return jsonify({"error": "A schedule is already being generated for this session", **job_links(job)}), 409
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def get_job(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/events', methods=['GET'])
+def stream_job_events(job_id):
+    """Server-Sent Events: a 'stage' event as each stage starts and finishes, then 'done'"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    response = Response(stream_with_context(job.stream_events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def run_course_pipeline(job, courses, workspace):
+    """Scrape the courses, generate the schedule and summarise the professors into workspace, reporting to job"""
+    try:
+        job.start_stage('scraping')
         print("Starting scraper...")
-        scraper_result = run_scraper(courses)
+        scraper_result = run_scraper(courses, workspace)
         if not scraper_result.get('success'):
             error_msg = f"Scraper failed: {scraper_result.get('error')}"
             log_error(error_msg)
-            return jsonify({"error": error_msg}), 500
+            return job.fail(error_msg)
+        job.finish_stage('scraping')
 
-        print("Getting time restrictions...")
-        time_restrictions = get_saved_time_restrictions()
-        
+        job.start_stage('scheduling')
         print("Starting algorithm...")
-        algorithm_result = run_algorithm()
+        algorithm_result = run_algorithm_with_events(job, workspace)
         
         if not algorithm_result.get('success'):
             error_message = algorithm_result.get('error', '')
-            if "Cannot create valid schedule" in error_message:
+            if algorithm_result.get('invalid_request'):
                 log_error(error_message)
-                return jsonify({"error": error_message}), 400
+                return job.fail(error_message, 400)
             else:
                 log_error(f"Algorithm failed: {error_message}")
-                return jsonify({"error": f"Algorithm failed: {error_message}"}), 500
+                return job.fail(f"Algorithm failed: {error_message}")
+        job.finish_stage('scheduling', optimal=algorithm_result['data']['schedule_info'].get('optimal'))
 
+        job.start_stage('summaries')
         print("Starting professor summaries generation...")
-        summaries_result = run_summaries()
+        summaries_result = run_summaries(workspace)
         if not summaries_result.get('success'):
             error_msg = f"Summaries failed: {summaries_result.get('error')}"
             log_error(error_msg)
-            return jsonify({"error": error_msg}), 500
+            return job.fail(error_msg)
+        job.finish_stage('summaries')
 
-        return jsonify({"success": True, "message": "Schedule generated successfully"}), 200
+        job.succeed({"success": True, "message": "Schedule generated successfully"})
+    except Exception as e:
+        error_trace = traceback.format_exc()
+        log_error(error_trace)
+        job.fail(str(e))
+
+@app.route('/schedule/search', methods=['POST'])
+def search_schedule():
+    """
+    Queue a schedule search over the session's saved courses and restrictions.
+    Its event stream sends an 'incumbent' event for each better schedule as it
+    is found, then 'optimal' or 'budget_exhausted' with the final schedule.
+    """
+    workspace = request_workspace()
+    try:
+        if not os.path.exists(workspace.schedule_path(COMBINED_COURSES_FILE)):
+            return jsonify({"error": "No course data, submit courses first"}), 404
+        
+        job = job_queue.submit(run_schedule_job, workspace, key=workspace.schedule_dir)
+        return jsonify(job_links(job)), 202
+    except JobAlreadyRunning as e:
+        return job_conflict(e.job)
     except Exception as e:
         error_trace = traceback.format_exc()
         log_error(error_trace)
         return jsonify({"error": str(e)}), 500
 
+def run_schedule_job(job, workspace):
+    """Generate the schedule for /schedule/search, reporting incumbents to job"""
+    algorithm_result = run_algorithm_with_events(job, workspace)
+    if not algorithm_result.get('success'):
+        error_message = algorithm_result.get('error', '')
+        log_error(f"Algorithm failed: {error_message}")
+        return job.fail(error_message, 400 if algorithm_result.get('invalid_request') else 500)
+    job.succeed({"success": True, "message": "Schedule generated successfully"})
+
+def run_algorithm_with_events(job, workspace):
+    """
+    run_algorithm, publishing an 'incumbent' event on job for every better
+    schedule the search finds and 'optimal' or 'budget_exhausted' at the end
+    """
+    def publish_incumbent(score, schedule):
+        job.publish('incumbent', {"score": score, "schedule": Algorithm.schedule_to_json(schedule)})
+    
+    algorithm_result = run_algorithm(workspace, publish_incumbent)
+    if algorithm_result.get('success'):
+        schedule_json = algorithm_result['data']
+        schedule_info = schedule_json['schedule_info']
+        job.publish('optimal' if schedule_info['optimal'] else 'budget_exhausted',
+                    {"score": schedule_info['score'], "schedule": schedule_json})
+    return algorithm_result
+
 @app.route('/restrictions', methods=['POST'])
 def handle_time_restrictions():
+    workspace = request_workspace()
     try:
         data = request.get_json()
         if not data:
@@ -213,12 +338,22 @@ def handle_time_restrictions():
         if not validate_time_restrictions(time_restrictions):
             return jsonify({"error": "Invalid time restrictions format"}), 400
 
-        save_time_restrictions(time_restrictions)
+        # Optional scoring objective; Algorithm.py falls back to its defaults without one
+        objective = data.get('objective')
+        if objective is not None:
+            try:
+                objective = ScoringObjective(objective).spec
+            except ValueError as e:
+                return jsonify({"error": f"Invalid scoring objective: {str(e)}"}), 400
+
+        save_time_restrictions(time_restrictions, workspace)
+        save_scoring_objective(objective, workspace)
 
         return jsonify({
             "status": "success",
             "message": "Time restrictions saved successfully",
-            "time_restrictions": time_restrictions
+            "time_restrictions": time_restrictions,
+            "objective": objective
         }), 200
     except Exception as e:
         error_trace = traceback.format_exc()
@@ -266,15 +401,14 @@ def validate_time_restrictions(restrictions):
     except (ValueError, KeyError):
         return False
 
-def save_time_restrictions(restrictions):
-    """Save time restrictions to a JSON file in the Schedule Jsons folder"""
+def save_time_restrictions(restrictions, workspace):
+    """Save time restrictions to a JSON file in the workspace's Schedule Jsons folder"""
     try:
         # Ensure the Schedule Jsons folder exists
-        if not os.path.exists(SCHEDULE_FOLDER):
-            os.makedirs(SCHEDULE_FOLDER)
+        workspace.ensure()
         
         # Define the full path for the time restrictions file
-        file_path = os.path.join(SCHEDULE_FOLDER, TIME_RESTRICTIONS_FILE)
+        file_path = workspace.schedule_path(TIME_RESTRICTIONS_FILE)
         
         # Save the restrictions to the file
         with open(file_path, 'w') as f:
@@ -282,11 +416,25 @@ def save_time_restrictions(restrictions):
     except IOError as e:
         raise Exception(f"Failed to save time restrictions: {str(e)}")
 
-def get_saved_time_restrictions():
-    """Retrieve saved time restrictions from the Schedule Jsons folder"""
+def save_scoring_objective(objective, workspace):
+    """Save the scoring objective next to the time restrictions, or remove it if None"""
+    file_path = workspace.schedule_path(SCORING_OBJECTIVE_FILE)
+    try:
+        if objective is None:
+            if os.path.exists(file_path):
+                os.unlink(file_path)
+            return
+        
+        with open(file_path, 'w') as f:
+            json.dump(objective, f, indent=2)
+    except IOError as e:
+        raise Exception(f"Failed to save scoring objective: {str(e)}")
+
+def get_saved_time_restrictions(workspace):
+    """Retrieve saved time restrictions from the workspace's Schedule Jsons folder"""
     try:
         # Define the full path for the time restrictions file
-        file_path = os.path.join(SCHEDULE_FOLDER, TIME_RESTRICTIONS_FILE)
+        file_path = workspace.schedule_path(TIME_RESTRICTIONS_FILE)
         
         # Check if the file exists
         if not os.path.exists(file_path):
@@ -299,7 +447,40 @@ def get_saved_time_restrictions():
         print(f"Error reading time restrictions: {str(e)}")
         return None
 
-def run_scraper(courses):
+def run_scraper(courses, workspace):
+    """Look courses up through ScraperService.py, or run Scrapper.py if the service isn't up"""
+    try:
+        response = requests.post(f"{SCRAPER_SERVICE_URL}/lookup",
+                                 json={"courses": courses},
+                                 timeout=SCRAPER_SERVICE_TIMEOUT)
+    except requests.ConnectionError:
+        return run_scraper_script(courses, workspace)
+    
+    try:
+        result = response.json()
+        if response.status_code != 200:
+            return {"success": False, "error": result.get('error', f"Scraper service returned {response.status_code}")}
+        if not result['courses'] and result['failed']:
+            return {"success": False, "error": f"Failed to retrieve data for {', '.join(result['failed'])}"}
+        
+        # Sorted so a course set always compiles to the same catalog version,
+        # whatever order the courses were entered in
+        file_path = workspace.schedule_path(COMBINED_COURSES_FILE)
+        with open(file_path, 'w') as f:
+            json.dump({course: result['courses'][course] for course in sorted(result['courses'])}, f, indent=4)
+        return {"success": True, "data": result}
+    except Exception as e:
+        return {"success": False, "error": str(e)}
+
+def workspace_env(workspace):
+    """
+    Environment for a pipeline script run for workspace. Scrapper.py,
+    allSummaries.py and CalendarConverterICS.py read and write their files in
+    the SCHEDULE_DIR folder it sets, defaulting to Schedule Jsons without it.
+    """
+    return {**os.environ, 'SCHEDULE_DIR': workspace.schedule_dir}
+
+def run_scraper_script(courses, workspace):
     """Run the Scrapper.py script"""
     try:
         # Convert courses list to command-line arguments
@@ -308,7 +489,8 @@ def run_scraper(courses):
         result = subprocess.run(cmd, 
                               capture_output=True,
                               text=True,
-                              check=True)
+                              check=True,
+                              env=workspace_env(workspace))
         
         return {"success": True, "data": result.stdout}
     except subprocess.CalledProcessError as e:
@@ -316,43 +498,44 @@ def run_scraper(courses):
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-def run_algorithm():
-    """Run the Algorithm.py script"""
+def run_algorithm(workspace, on_improvement=None):
+    """Generate the schedule in-process with Algorithm.generate_schedule, or reuse a cached one"""
     try:
-        result = subprocess.run(['python', 'Algorithm.py'],
-                              capture_output=True,
-                              text=True)
+        catalog, time_prefs, objective = Algorithm.load_schedule_request(workspace.schedule_dir)
+        request_key = (list(catalog.courses), time_prefs, objective, catalog.version)
         
-        # Check if the process failed
-        if result.returncode != 0:
-            # Check for specific error messages in stderr
-            error_output = result.stderr.strip()
-            if error_output.startswith("ERROR: Cannot create valid schedule"):
-                return {"success": False, "error": error_output}
-            return {"success": False, "error": f"Algorithm execution failed: {error_output}"}
+        cached = result_cache.get(*request_key)
+        if cached is not None:
+            Algorithm.save_schedule_json(cached, workspace.schedule_dir)
+            return {"success": True, "data": cached, "cached": True}
         
-        # Correct path for generated_schedule.json
-        generated_schedule_path = os.path.join(SCHEDULE_FOLDER, 'generated_schedule.json')
-        if not os.path.exists(generated_schedule_path):
-            return {"success": False, "error": "Failed to generate schedule"}
-            
-        return {"success": True}
-            
-    except subprocess.CalledProcessError as e:
-        return {"success": False, "error": f"Algorithm execution failed: {e.stderr}"}
+        result = Algorithm.generate_schedule(catalog.courses, time_prefs, objective,
+                                             on_improvement=on_improvement)
+        Algorithm.save_schedule_json(result.schedule_json, workspace.schedule_dir)
+        # A search cut short by its budget might do better next time
+        if result.optimal:
+            result_cache.put(*request_key, result.schedule_json)
+        return {"success": True, "data": result.schedule_json}
+    except Algorithm.InvalidScheduleRequest as e:
+        # validity.json is what the front end shows for an impossible request
+        Algorithm.log_validity_errors(e.errors, workspace.validation_dir)
+        return {"success": False, "invalid_request": True, "error": str(e)}
+    except Algorithm.ScheduleError as e:
+        return {"success": False, "error": str(e)}
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-def run_summaries():
+def run_summaries(workspace):
     """Run the allSummaries.py script"""
     try:
         result = subprocess.run(['python', 'allSummaries.py'],
                                capture_output=True,
                                text=True,
-                               check=True)
+                               check=True,
+                               env=workspace_env(workspace))
         
         # Correct path for professor_summaries.json
-        summaries_path = os.path.join(SCHEDULE_FOLDER, 'professor_summaries.json')
+        summaries_path = workspace.schedule_path('professor_summaries.json')
         
         try:
             with open(summaries_path, 'r') as f:
@@ -0,0 +1,148 @@
+import json
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_RETENTION = 60 * 60   # Seconds a finished job stays queryable
+HEARTBEAT_INTERVAL = 15   # Seconds between keep-alive comments on an idle event stream
+
+class JobAlreadyRunning(Exception):
+    """Another job with the same key is still queued or running; it is in .job."""
+
+    def __init__(self, job):
+        super().__init__(f"Job {job.id} is still {job.status}")
+        self.job = job
+
+class Job:
+    """
+    One background run of a multi-stage pipeline.
+    Every change is also recorded as an event (stage started/finished, done)
+    so event streams can replay what they missed and then follow along.
+    """
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.status = 'queued'   # queued, running, succeeded or failed
+        self.stage = None
+        self.completed_stages = []
+        self.result = None
+        self.error = None
+        self.status_code = None  # HTTP status a synchronous request would have returned
+        self.created_at = time.time()
+        self.finished_at = None
+        self.events = []
+        self.condition = threading.Condition()
+
+    @property
+    def finished(self):
+        return self.status in ('succeeded', 'failed')
+
+    def publish(self, event, data):
+        with self.condition:
+            self.events.append((event, data))
+            self.condition.notify_all()
+
+    def start_stage(self, stage):
+        self.stage = stage
+        self.publish('stage', {"stage": stage, "status": "started"})
+
+    def finish_stage(self, stage, **details):
+        self.completed_stages.append(stage)
+        self.publish('stage', {"stage": stage, "status": "finished", **details})
+
+    def succeed(self, result=None):
+        self.result = result
+        self.status_code = 200
+        self._finish('succeeded')
+
+    def fail(self, error, status_code=500):
+        self.error = error
+        self.status_code = status_code
+        self._finish('failed')
+
+    def _finish(self, status):
+        self.status = status
+        self.finished_at = time.time()
+        self.publish('done', self.to_dict())
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "completed_stages": list(self.completed_stages),
+            "result": self.result,
+            "error": self.error,
+            "status_code": self.status_code
+        }
+
+    def wait_for_events(self, start, timeout):
+        """Events from index start on, waiting up to timeout seconds for one to arrive."""
+        with self.condition:
+            if len(self.events) <= start:
+                self.condition.wait(timeout)
+            return self.events[start:]
+
+    def stream_events(self):
+        """Server-Sent Events for this job, ending after the 'done' event."""
+        sent = 0
+        while True:
+            events = self.wait_for_events(sent, HEARTBEAT_INTERVAL)
+            if not events:
+                yield ": keep-alive\n\n"
+                continue
+            for event, data in events:
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+                if event == 'done':
+                    return
+            sent += len(events)
+
+class JobQueue:
+    """Runs jobs on a fixed pool of worker threads and keeps them around for status queries."""
+
+    def __init__(self, workers):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='job')
+        self.jobs = {}
+        self.active = {}   # key -> latest job submitted with it
+        self.lock = threading.Lock()
+
+    def submit(self, target, *args, key=None):
+        """
+        Queue target(job, *args); it reports progress and its outcome through the job.
+        Only one job per key runs at a time: raises JobAlreadyRunning while the last one is unfinished.
+        """
+        job = Job()
+        with self.lock:
+            self._evict_finished()
+            if key is not None:
+                running = self.active.get(key)
+                if running is not None and not running.finished:
+                    raise JobAlreadyRunning(running)
+                self.active[key] = job
+            self.jobs[job.id] = job
+        self.executor.submit(self._run, job, target, args)
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def _run(self, job, target, args):
+        job.status = 'running'
+        try:
+            target(job, *args)
+            if not job.finished:
+                job.succeed()
+        except Exception as e:
+            traceback.print_exc()
+            job.fail(str(e))
+
+    def _evict_finished(self):
+        cutoff = time.time() - JOB_RETENTION
+        for job_id in [job_id for job_id, job in self.jobs.items()
+                       if job.finished and job.finished_at < cutoff]:
+            del self.jobs[job_id]
+        for key in [key for key, job in self.active.items() if job.finished]:
+            del self.active[key]
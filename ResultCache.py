@@ -0,0 +1,96 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+MAX_ENTRIES = 256                # Least recently used results beyond this are evicted
+MAX_BYTES = 16 * 1024 * 1024     # Upper bound on the serialized size of all cached results
+
+def request_fingerprint(course_codes, time_preferences, objective, catalog_version):
+    """
+    Canonical hash of everything a generated schedule depends on: the course
+    set (in any order), the time restrictions per day, the scoring objective
+    and the version of the catalog the sections came from.
+    """
+    restrictions = time_preferences.restrictions if time_preferences is not None else None
+    request = {
+        'courses': sorted(course_codes),
+        'restrictions': restrictions,
+        'objective': objective.spec if objective is not None else None,
+        'catalog': catalog_version
+    }
+    canonical = json.dumps(request, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+class ScheduleResultCache:
+    """
+    In-memory LRU cache of generated schedule JSON keyed by request_fingerprint.
+    It holds at most max_entries results and max_bytes of serialized JSON,
+    dropping the least recently used first. When a course set shows up with a
+    new catalog version (its sections were scraped again and changed), every
+    result built from the old version is dropped. Cached schedules are shared
+    between callers and must not be modified.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()   # fingerprint -> (course set, catalog version, schedule JSON, size)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, course_codes, time_preferences, objective, catalog_version):
+        """The cached schedule JSON for this request, or None."""
+        key = request_fingerprint(course_codes, time_preferences, objective, catalog_version)
+        with self.lock:
+            self._check_catalog(frozenset(course_codes), catalog_version)
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, course_codes, time_preferences, objective, catalog_version, schedule_json):
+        key = request_fingerprint(course_codes, time_preferences, objective, catalog_version)
+        size = len(json.dumps(schedule_json))
+        if size > self.max_bytes:
+            return
+        course_set = frozenset(course_codes)
+        with self.lock:
+            self._check_catalog(course_set, catalog_version)
+            self._discard(key)
+            self.entries[key] = (course_set, catalog_version, schedule_json, size)
+            self.size += size
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                self._discard(next(iter(self.entries)))
+
+    def invalidate(self, course_codes=None):
+        """Drop the results for one course set, or everything."""
+        with self.lock:
+            if course_codes is None:
+                self.entries.clear()
+                self.size = 0
+                return
+            self._drop(lambda entry: entry[0] == frozenset(course_codes))
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "bytes": self.size,
+                    "hits": self.hits, "misses": self.misses}
+
+    def _check_catalog(self, course_set, catalog_version):
+        # Results built from an older scrape of these courses are stale
+        self._drop(lambda entry: entry[0] == course_set and entry[1] != catalog_version)
+
+    def _drop(self, matches):
+        for key in [key for key, entry in self.entries.items() if matches(entry)]:
+            self._discard(key)
+
+    def _discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[3]
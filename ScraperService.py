@@ -0,0 +1,177 @@
+import argparse
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Flask, request, jsonify
+
+import Scrapper
+from CourseCache import CourseCache, FRESH_TTL, MAX_ENTRIES, STALE, STALE_TTL
+
+# Where Flask.py looks for the service
+SERVICE_HOST = '127.0.0.1'
+SERVICE_PORT = 5001
+
+POOL_SIZE = 8          # Pooled keep-alive connections, and concurrent searches, to the registration site
+
+class SessionExpired(Exception):
+    """The registration site no longer accepts the saved cookies."""
+
+def is_session_expired(response):
+    """An expired session is refused or redirected to the login page; other failures are not logins."""
+    if response.status_code in (401, 403):
+        return True
+    return bool(response.history) and 'login' in response.url.lower()
+
+def fetch_course_json(session, url):
+    """One course search; raises SessionExpired instead of returning a login page."""
+    response = session.get(url, timeout=Scrapper.REQUEST_TIMEOUT)
+    if is_session_expired(response):
+        raise SessionExpired(url)
+    response.raise_for_status()
+    return response.json()
+
+class ScraperService:
+    """
+    Long-lived course lookups against the registration site.
+    The cookies from one manual login are kept in a pooled requests.Session
+    and reused for every lookup; the browser only opens again when the site
+    reports the session as expired. login is a callable returning the
+    session cookies as a dict (Scrapper.browser_login by default).
+
+    Results go through cache, a CourseCache: fresh entries are served as is,
+    stale ones are served and refetched in the background, and only missing
+    or expired courses are fetched while the caller waits.
+    """
+
+    def __init__(self, term=Scrapper.DEFAULT_TERM, login=Scrapper.browser_login, pool_size=POOL_SIZE,
+                 cache=None):
+        self.term = term
+        self.login = login
+        self.cache = cache if cache is not None else CourseCache()
+        self.revalidator = ThreadPoolExecutor(max_workers=1)
+        self.revalidating = set()
+        self.pool_size = pool_size
+        self.session = Scrapper.create_http_session(pool_size=pool_size)
+        self.authenticated = False
+        # Logins and the site's per-session search state are one at a time
+        self.lock = threading.RLock()
+
+    def authenticate(self):
+        """Log in again and replace the saved cookies."""
+        with self.lock:
+            cookies = self.login()
+            self.session.cookies.clear()
+            self.session.cookies.update(cookies)
+            self.authenticated = True
+
+    def fetch_and_cache(self, course_codes, term, relogin=True):
+        """
+        Fetch courses concurrently over the pooled session and cache them.
+        With relogin, courses refused because the session expired are retried
+        once after logging in again. Returns ({course_code: sessions}, failed).
+        """
+        with self.lock:
+            results = Scrapper.fetch_all_course_data(self.session, course_codes, term,
+                                                     self.pool_size, fetch_course_json)
+            expired = [course for course, result in results.items() if isinstance(result, SessionExpired)]
+            if expired and relogin:
+                print("Session expired, logging in again...")
+                self.authenticate()
+                results.update(Scrapper.fetch_all_course_data(self.session, expired, term,
+                                                              self.pool_size, fetch_course_json))
+
+        fetched, failed = {}, []
+        for course_code in course_codes:
+            result = results.get(course_code)
+            if isinstance(result, Exception) or not result:
+                Scrapper.log_error(f"Error processing {course_code}: {result!r}")
+                failed.append(course_code)
+                continue
+            fetched[course_code] = Scrapper.extract_meeting_info(result)
+            self.cache.put(course_code, term, fetched[course_code])
+        return fetched, failed
+
+    def _revalidate(self, course_code, term):
+        try:
+            # A background refresh never opens the login browser by itself
+            if self.authenticated:
+                self.fetch_and_cache([course_code], term, relogin=False)
+        except Exception as e:
+            Scrapper.log_error(f"Error refreshing {course_code}: {str(e)}", traceback.format_exc())
+        finally:
+            self.revalidating.discard((course_code, term))
+
+    def lookup(self, courses, term=None):
+        """
+        Meetings for each course as {course_code: [session dict, ...]}, plus
+        the list of courses that couldn't be fetched.
+        """
+        term = term or self.term
+        combined_data = {}
+        missing = []
+        for course_code in courses:
+            cached = self.cache.get(course_code, term)
+            if cached is None:
+                missing.append(course_code)
+                continue
+            combined_data[course_code], state = cached
+            if state == STALE and (course_code, term) not in self.revalidating:
+                self.revalidating.add((course_code, term))
+                self.revalidator.submit(self._revalidate, course_code, term)
+
+        failed = []
+        if missing:
+            with self.lock:
+                if not self.authenticated:
+                    self.authenticate()
+                fetched, failed = self.fetch_and_cache(missing, term)
+            combined_data.update(fetched)
+
+        # Keep the requested course order
+        return {course: combined_data[course] for course in courses if course in combined_data}, failed
+
+def create_app(service):
+    """The HTTP front end Flask.py talks to, serving lookups from service."""
+    app = Flask(__name__)
+
+    @app.route('/health', methods=['GET'])
+    def health():
+        return jsonify({"status": "ok", "authenticated": service.authenticated, "term": service.term})
+
+    @app.route('/lookup', methods=['POST'])
+    def lookup():
+        try:
+            data = request.get_json() or {}
+            courses = data.get('courses', [])
+            if not courses:
+                return jsonify({"error": "No courses provided"}), 400
+
+            combined_data, failed = service.lookup(courses, data.get('term'))
+            return jsonify({"courses": combined_data, "failed": failed}), 200
+        except Exception as e:
+            Scrapper.log_error(f"Lookup failed: {str(e)}", traceback.format_exc())
+            return jsonify({"error": str(e)}), 500
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve course lookups from one persistent login.")
+    parser.add_argument('--host', default=SERVICE_HOST)
+    parser.add_argument('--port', type=int, default=SERVICE_PORT)
+    parser.add_argument('--term', default=Scrapper.DEFAULT_TERM)
+    parser.add_argument('--login-now', action='store_true', help="log in at startup instead of on the first lookup")
+    parser.add_argument('--fresh-ttl', type=float, default=FRESH_TTL, help="seconds cached courses are served as is")
+    parser.add_argument('--stale-ttl', type=float, default=STALE_TTL,
+                        help="seconds cached courses are served while being refreshed")
+    parser.add_argument('--max-entries', type=int, default=MAX_ENTRIES, help="courses kept in the cache")
+    args = parser.parse_args()
+
+    cache = CourseCache(fresh_ttl=args.fresh_ttl, stale_ttl=args.stale_ttl, max_entries=args.max_entries)
+    service = ScraperService(term=args.term, cache=cache)
+    if args.login_now:
+        service.authenticate()
+    create_app(service).run(host=args.host, port=args.port, threaded=True)
+
+if __name__ == "__main__":
+    main()
@@ -4,19 +4,30 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
 import json
 import os
 import sys
 from datetime import datetime
 import traceback
+from CourseCache import CourseCache, STALE
 
 # Get courses from command line or use default list
 courses = sys.argv[1:] if len(sys.argv) > 1 else ["MATH1010U", "CSCI2050U", "BUSI1700U", "PHY1020U", "CSCI1061U"]
 
+DEFAULT_TERM = "202501"
+LOGIN_URL = "https://ssp.mycampus.ca/StudentRegistrationSsb/ssb/registration/registerPostSignIn?mode=search&mepCode=UOIT"
+CLASS_SEARCH_URL = "https://ssp.mycampus.ca/StudentRegistrationSsb/ssb/classSearch/classSearch"
+REQUEST_HEADERS = {"User-Agent": "Mozilla/5.0"}
+FETCH_WORKERS = 6      # Course searches in flight at once, each on a pooled keep-alive connection
+REQUEST_TIMEOUT = 30   # Seconds per course search
+SCHEDULE_DIR = os.environ.get("SCHEDULE_DIR", "Schedule Jsons")
+
 def ensure_directories():
     """Create necessary directories if they don't exist"""
-    directories = ["logs", "logs/Scrapper Logs", "Schedule Jsons"]
+    directories = ["logs", "logs/Scrapper Logs", SCHEDULE_DIR]
     for directory in directories:
         if not os.path.exists(directory):
             os.makedirs(directory)
@@ -41,13 +52,47 @@ def build_urls(courses, term):
     base_url = "https://ssp.mycampus.ca/StudentRegistrationSsb/ssb/searchResults/searchResults"
     return [f"{base_url}?txt_subjectcoursecombo={course}&txt_term={term}" for course in courses]
 
-def scrape_course_data(driver, url, session_cookie, headers):
-    driver.get("https://ssp.mycampus.ca/StudentRegistrationSsb/ssb/classSearch/classSearch")
-    response = requests.get(url, headers=headers, cookies=session_cookie)
+def create_http_session(cookies=None, pool_size=FETCH_WORKERS):
+    """A requests.Session whose keep-alive pool has room for pool_size concurrent searches"""
+    session = requests.Session()
+    session.headers.update(REQUEST_HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    if cookies:
+        session.cookies.update(cookies)
+    return session
+
+def scrape_course_data(session, url):
+    response = session.get(url, timeout=REQUEST_TIMEOUT)
     if response.status_code == 200:
         return response.json()
     return None
 
+def fetch_all_course_data(session, course_codes, term, workers=FETCH_WORKERS, fetch=scrape_course_data):
+    """
+    Search for every course concurrently over one session's connection pool.
+    The search form is reset once up front instead of before every search.
+    fetch(session, url) does a single search. Returns {course_code: result},
+    where a failed search's result is the exception it raised.
+    """
+    if not course_codes:
+        return {}
+    session.get(CLASS_SEARCH_URL, timeout=REQUEST_TIMEOUT)
+    
+    results = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(course_codes)))) as executor:
+        futures = {
+            executor.submit(fetch, session, url): course_code
+            for course_code, url in zip(course_codes, build_urls(course_codes, term))
+        }
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                results[futures[future]] = e
+    return results
+
 def extract_meeting_info(data):
     extracted_data = []
     seen_crns = set()
@@ -84,7 +129,7 @@ def save_course_data(course_code, data):
     """Save individual course data to a JSON file in Schedule Jsons directory"""
     try:
         ensure_directories()
-        filepath = os.path.join("Schedule Jsons", f"{course_code}.json")
+        filepath = os.path.join(SCHEDULE_DIR, f"{course_code}.json")
         with open(filepath, "w") as f:
             json.dump(data, f, indent=4)
         print(f"Saved data for {course_code}")
@@ -96,7 +141,7 @@ def save_combined_data(combined_data):
     """Save the combined course data to a single JSON file in Schedule Jsons directory"""
     try:
         ensure_directories()
-        filepath = os.path.join("Schedule Jsons", "combined_courses.json")
+        filepath = os.path.join(SCHEDULE_DIR, "combined_courses.json")
         with open(filepath, "w") as f:
             json.dump(combined_data, f, indent=4)
         print("Saved combined course data")
@@ -108,7 +153,7 @@ def cleanup_individual_files(courses):
     """Remove individual course JSON files from Schedule Jsons directory"""
     for course in courses:
         try:
-            filepath = os.path.join("Schedule Jsons", f"{course}.json")
+            filepath = os.path.join(SCHEDULE_DIR, f"{course}.json")
             os.remove(filepath)
             print(f"Removed {course}.json")
         except FileNotFoundError:
@@ -116,70 +161,109 @@ def cleanup_individual_files(courses):
         except Exception as e:
             log_error(f"Error removing {course}.json: {str(e)}", traceback.format_exc())
 
+def create_login_driver():
+    """Open Chrome in a small app window for the manual login"""
+    # Setup Chrome options for controlled window size
+    chrome_options = Options()
+    chrome_options.add_argument("--app=data:,")  # Run in app mode
+    chrome_options.add_argument("--window-size=1024,768")
+    chrome_options.add_argument("--window-position=0,0")
+    chrome_options.add_argument("--disable-infobars")
+    chrome_options.add_argument("--disable-notifications")
+    chrome_options.add_argument("--disable-extensions")
+    # Add these new options to disable password saving prompts
+    chrome_options.add_argument("--password-store=basic")
+    chrome_options.add_experimental_option("prefs", {
+        "credentials_enable_service": False,
+        "profile.password_manager_enabled": False
+    })
+    chrome_options.add_experimental_option("useAutomationExtension", False)
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    
+    # Setup WebDriver with custom options
+    driver = webdriver.Chrome(options=chrome_options)
+    
+    # Set window size after browser opens to ensure it takes effect
+    driver.set_window_size(1024, 768)
+    driver.set_window_position(0, 0)
+    return driver
+
+def wait_for_manual_login(driver):
+    """Open the login page, wait for the user to pick a term and return the session cookies"""
+    wait = WebDriverWait(driver, 1000000)
+    
+    # Open login page and wait for manual login
+    print("Opening browser for manual login...")
+    driver.get(LOGIN_URL)
+    
+    term_button = wait.until(EC.presence_of_element_located((By.ID, "term-go")))
+    while True:
+        try:
+            if term_button.is_displayed():
+                continue  # Button is still visible, wait
+            else:
+                break  # Button is gone, meaning the user clicked it
+        except:
+            break  # If the button element is no longer found, assume it's clicked
+    
+    # Get session cookies after manual login
+    cookies = driver.get_cookies()
+    return {cookie['name']: cookie['value'] for cookie in cookies}
+
+def browser_login():
+    """Log in through a browser window that is closed again once the cookies are read"""
+    driver = create_login_driver()
+    try:
+        return wait_for_manual_login(driver)
+    finally:
+        driver.quit()
+
 def main():
     print("Starting course data scraping...")
-    term = "202501"
-    json_urls = build_urls(courses, term)
+    term = DEFAULT_TERM
     driver = None
     
     try:
-        # Setup Chrome options for controlled window size
-        chrome_options = Options()
-        chrome_options.add_argument("--app=data:,")  # Run in app mode
-        chrome_options.add_argument("--window-size=1024,768")
-        chrome_options.add_argument("--window-position=0,0")
-        chrome_options.add_argument("--disable-infobars")
-        chrome_options.add_argument("--disable-notifications")
-        chrome_options.add_argument("--disable-extensions")
-        # Add these new options to disable password saving prompts
-        chrome_options.add_argument("--password-store=basic")
-        chrome_options.add_experimental_option("prefs", {
-            "credentials_enable_service": False,
-            "profile.password_manager_enabled": False
-        })
-        chrome_options.add_experimental_option("useAutomationExtension", False)
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        
-        # Setup WebDriver with custom options
-        driver = webdriver.Chrome(options=chrome_options)
-        
-        # Set window size after browser opens to ensure it takes effect
-        driver.set_window_size(1024, 768)
-        driver.set_window_position(0, 0)
-        
-        wait = WebDriverWait(driver, 1000000)
-        
-        # Open login page and wait for manual login
-        print("Opening browser for manual login...")
-        driver.get("https://ssp.mycampus.ca/StudentRegistrationSsb/ssb/registration/registerPostSignIn?mode=search&mepCode=UOIT")
-        
-        term_button = wait.until(EC.presence_of_element_located((By.ID, "term-go")))
-        while True:
-            try:
-                if term_button.is_displayed():
-                    continue  # Button is still visible, wait
-                else:
-                    break  # Button is gone, meaning the user clicked it
-            except:
-                break  # If the button element is no longer found, assume it's clicked
+        # Serve what the cache still has; only missing or expired courses need a login
+        cache = CourseCache()
+        combined_data = {}
+        missing, stale = [], []
+        for course_code in courses:
+            cached = cache.get(course_code, term)
+            if cached is None:
+                missing.append(course_code)
+            else:
+                combined_data[course_code] = cached[0]
+                if cached[1] == STALE:
+                    stale.append(course_code)
         
-        # Get session cookies after manual login
-        cookies = driver.get_cookies()
-        session_cookie = {cookie['name']: cookie['value'] for cookie in cookies}
-        headers = {"User-Agent": "Mozilla/5.0"}
+        # Stale courses are refreshed too when the browser has to open anyway
+        to_fetch = missing + stale if missing else []
+        fetched = {}
+        if to_fetch:
+            driver = create_login_driver()
+            session_cookie = wait_for_manual_login(driver)
+            # The browser is only needed for the login
+            driver.quit()
+            driver = None
+            
+            print(f"\nFetching {', '.join(to_fetch)}...")
+            fetched = fetch_all_course_data(create_http_session(session_cookie), to_fetch, term)
+        else:
+            print("All courses served from the cache")
         
         # Process each course
-        combined_data = {}
-        for i, url in enumerate(json_urls):
-            course_code = courses[i]
+        for course_code in to_fetch:
             print(f"\nProcessing {course_code}...")
             
             try:
-                # Scrape and extract data
-                course_data = scrape_course_data(driver, url, session_cookie, headers)
+                course_data = fetched.get(course_code)
+                if isinstance(course_data, Exception):
+                    raise course_data
                 if course_data:
                     extracted_data = extract_meeting_info(course_data)
                     combined_data[course_code] = extracted_data
+                    cache.put(course_code, term, extracted_data)
                     
                     # Save individual file
                     save_course_data(course_code, extracted_data)
@@ -191,13 +275,14 @@ def main():
                 log_error(f"Error processing {course_code}: {str(e)}", traceback.format_exc())
                 continue
         
-        # Save combined data
+        # Save combined data sorted by course code, so the same course set
+        # always produces the same file
         print("\nSaving combined data...")
-        save_combined_data(combined_data)
+        save_combined_data({course: combined_data[course] for course in sorted(combined_data)})
         
         # Cleanup individual files
         print("\nCleaning up individual files...")
-        cleanup_individual_files(courses)
+        cleanup_individual_files(to_fetch)
         
         print("\nProcess completed successfully!")
         
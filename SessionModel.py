@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+import pickle
+import sys
+from enum import IntEnum
+
+# Occupancy bitmasks: every day of the week gets SLOTS_PER_DAY bits, one per
+# minute, so two sessions overlap exactly when their masks do.
+DAYS_OF_WEEK = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+DAY_INDEX = {day: index for index, day in enumerate(DAYS_OF_WEEK)}
+SLOT_MINUTES = 1
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+def convert_time_to_minutes(time_str):
+    """Convert time string (e.g., '0940') to minutes since midnight."""
+    hours = int(time_str[:2])
+    minutes = int(time_str[2:])
+    return hours * 60 + minutes
+
+def session_day_mask(session):
+    """Bitmask of the days a session meets on (bit 0 is Monday)."""
+    if isinstance(session, Session):
+        return session.day_mask
+
+    mask = 0
+    for day in session['daysOfWeek']:
+        mask |= 1 << DAY_INDEX[day]
+    return mask
+
+def session_occupancy_mask(session):
+    """
+    Compile a session into a week-long occupancy bitmask.
+    A session claims the minutes from its begin time up to, but not
+    including, its end time, so back-to-back sessions don't conflict.
+    """
+    if isinstance(session, Session):
+        return session.occupancy
+
+    first_slot = convert_time_to_minutes(session['beginTime']) // SLOT_MINUTES
+    last_slot = -(-convert_time_to_minutes(session['endTime']) // SLOT_MINUTES)
+    day_bits = ((1 << (last_slot - first_slot)) - 1) << first_slot
+
+    mask = 0
+    for day in session['daysOfWeek']:
+        mask |= day_bits << (DAY_INDEX[day] * SLOTS_PER_DAY)
+    return mask
+
+class SessionType(IntEnum):
+    """Meeting schedule types the scheduler knows about."""
+    LEC = 0
+    LAB = 1
+    TUT = 2
+    OTHER = 3
+
+    @classmethod
+    def parse(cls, name):
+        return cls.__members__.get(name, cls.OTHER)
+
+def _intern(text):
+    return sys.intern(text) if isinstance(text, str) else text
+
+# One shared tuple per distinct day pattern instead of a list per session
+_day_patterns = {}
+
+class Session:
+    """
+    One scraped meeting of a course section, as produced by
+    Scrapper.extract_meeting_info, with times, days and occupancy pre-parsed.
+    Text fields are interned so the many sections sharing a professor,
+    building or campus share one string.
+
+    Sessions still answer the scraper's dict keys (session['beginTime'],
+    session.get('room')), so code written against the JSON dicts keeps
+    working; the search itself reads the attributes.
+    """
+
+    __slots__ = ('crn', 'type', 'meeting_type', 'begin_time', 'end_time', 'begin', 'end',
+                 'days', 'day_indices', 'day_mask', 'occupancy', 'professor', 'building',
+                 'room', 'campus', 'start_date', 'end_date', 'hours_week', 'equivalents')
+
+    # Scraper dict key -> attribute
+    FIELDS = {
+        'displayName': 'professor',
+        'startdate': 'start_date',
+        'building': 'building',
+        'enddate': 'end_date',
+        'campus': 'campus',
+        'room': 'room',
+        'courseReferenceNumber': 'crn',
+        'meetingScheduleType': 'meeting_type',
+        'beginTime': 'begin_time',
+        'endTime': 'end_time',
+        'hoursWeek': 'hours_week',
+        'daysOfWeek': 'days',
+    }
+
+    def __init__(self, data):
+        days = tuple(sys.intern(day) for day in data['daysOfWeek'])
+        days = _day_patterns.setdefault(days, days)
+
+        self.crn = _intern(data['courseReferenceNumber'])
+        self.meeting_type = _intern(data['meetingScheduleType'])
+        self.type = SessionType.parse(self.meeting_type)
+        self.begin_time = _intern(data['beginTime'])
+        self.end_time = _intern(data['endTime'])
+        self.begin = convert_time_to_minutes(self.begin_time)
+        self.end = convert_time_to_minutes(self.end_time)
+        self.days = days
+        self.day_indices = tuple(DAY_INDEX[day] for day in days)
+        self.day_mask = session_day_mask(data)
+        self.occupancy = session_occupancy_mask(data)
+        self.professor = _intern(data.get('displayName'))
+        self.building = _intern(data.get('building'))
+        self.room = _intern(data.get('room'))
+        self.campus = _intern(data.get('campus'))
+        self.start_date = _intern(data.get('startdate'))
+        self.end_date = _intern(data.get('enddate'))
+        self.hours_week = data.get('hoursWeek')
+        self.equivalents = ()
+
+    def time_pattern(self):
+        """Sessions with equal patterns are interchangeable for scheduling."""
+        return (self.meeting_type, self.days, self.begin, self.end)
+
+    def with_equivalents(self, equivalents):
+        """Copy of this session standing in for equivalent ones as well."""
+        copy = object.__new__(Session)
+        for attribute in Session.__slots__:
+            setattr(copy, attribute, getattr(self, attribute))
+        copy.equivalents = tuple(equivalents)
+        return copy
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, self.FIELDS[key])
+        except KeyError:
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        attribute = self.FIELDS.get(key)
+        return getattr(self, attribute) if attribute else default
+
+    def __contains__(self, key):
+        return key in self.FIELDS
+
+    def to_dict(self):
+        """Back to the scraper's dict format (daysOfWeek as a list)."""
+        data = {key: getattr(self, attribute) for key, attribute in self.FIELDS.items()}
+        data['daysOfWeek'] = list(self.days)
+        return data
+
+    def __repr__(self):
+        return (f"Session({self.meeting_type} {self.crn} {'/'.join(self.days)} "
+                f"{self.begin_time}-{self.end_time})")
+
+def collapse_equivalent_sessions(sessions):
+    """
+    Collapse sessions sharing a time pattern (type, days, begin and end) that
+    differ only in CRN, room or professor into one representative each.
+    The first session of each pattern stands in for the group and carries the
+    rest in .equivalents. Order follows each pattern's first appearance.
+    """
+    groups = {}
+    for session in sessions:
+        groups.setdefault(session.time_pattern(), []).append(session)
+    return [
+        group[0] if len(group) == 1 else group[0].with_equivalents(group[1:])
+        for group in groups.values()
+    ]
+
+def sessions_from_course_data(course_data):
+    """Convert {course_code: [session dict, ...]} to Sessions, passing Sessions through."""
+    return {
+        course_code: [session if isinstance(session, Session) else Session(session)
+                      for session in sessions]
+        for course_code, sessions in course_data.items()
+    }
+
+# Bump when Session or the Catalog layout changes so old artifacts are rebuilt
+CATALOG_FORMAT_VERSION = 3
+CATALOG_CACHE_DIR = 'compiled'
+
+class Catalog:
+    """
+    Compiled form of a combined_courses.json file: its Sessions per course and
+    the content hash of the JSON they came from, which doubles as the
+    catalog version.
+    """
+
+    def __init__(self, courses, version):
+        self.courses = courses
+        self.version = version
+
+def catalog_cache_path(path, version):
+    """Where the compiled artifact for a given version of a JSON file lives."""
+    directory, filename = os.path.split(path)
+    stem = os.path.splitext(filename)[0]
+    return os.path.join(directory, CATALOG_CACHE_DIR, f"{stem}.{version[:16]}.catalog")
+
+def compile_catalog(path, source=None):
+    """
+    Parse a combined_courses.json file into a Catalog and write it next to
+    the JSON as a pickled artifact named after the file's content hash.
+    Artifacts for earlier versions of the same file are removed.
+    """
+    if source is None:
+        with open(path, 'rb') as f:
+            source = f.read()
+    version = hashlib.sha256(source).hexdigest()
+    catalog = Catalog(sessions_from_course_data(json.loads(source)), version)
+
+    artifact_path = catalog_cache_path(path, version)
+    cache_dir = os.path.dirname(artifact_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    stem = os.path.basename(artifact_path).split('.')[0]
+    for filename in os.listdir(cache_dir):
+        if filename.startswith(stem + '.') and filename.endswith('.catalog'):
+            os.remove(os.path.join(cache_dir, filename))
+
+    # Write then rename so a concurrent reader never sees half an artifact
+    temp_path = f"{artifact_path}.{os.getpid()}.tmp"
+    with open(temp_path, 'wb') as f:
+        pickle.dump((CATALOG_FORMAT_VERSION, catalog), f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temp_path, artifact_path)
+    return catalog
+
+def load_catalog(path, use_cache=True):
+    """
+    Load a combined_courses.json file as a Catalog.
+    The file is hashed and, when a compiled artifact for that hash exists, the
+    Catalog is read straight from it instead of reparsing the JSON and
+    rebuilding every Session. Otherwise it is compiled and cached.
+    """
+    with open(path, 'rb') as f:
+        source = f.read()
+    version = hashlib.sha256(source).hexdigest()
+    if not use_cache:
+        return Catalog(sessions_from_course_data(json.loads(source)), version)
+
+    try:
+        with open(catalog_cache_path(path, version), 'rb') as f:
+            format_version, catalog = pickle.load(f)
+        if format_version == CATALOG_FORMAT_VERSION and catalog.version == version:
+            return catalog
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError, TypeError):
+        pass
+    return compile_catalog(path, source)
+
+def load_course_sessions(path, use_cache=True):
+    """Load a combined_courses.json file as {course_code: [Session, ...]}."""
+    return load_catalog(path, use_cache).courses
@@ -0,0 +1,76 @@
+import os
+import re
+import shutil
+import time
+
+SCHEDULE_FOLDER = 'Schedule Jsons'
+VALIDATION_FOLDER = 'validation'
+WORKSPACES_FOLDER = 'workspaces'
+
+# Header (or session_id query parameter) the front end identifies itself with
+SESSION_HEADER = 'X-Session-Id'
+WORKSPACE_TTL = 24 * 60 * 60  # Seconds an untouched session workspace is kept
+
+_SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
+class InvalidSession(ValueError):
+    """A session ID that can't safely name a workspace folder."""
+
+class Workspace:
+    """
+    The folders one browser session's pipeline reads and writes.
+    A session gets workspaces/<session_id>/Schedule Jsons and .../validation,
+    so concurrent users never see each other's files. Without a session ID
+    the shared top-level folders are used, as before workspaces existed.
+    """
+
+    def __init__(self, session_id=None, root=WORKSPACES_FOLDER):
+        if session_id is not None and not _SESSION_ID_PATTERN.match(session_id):
+            raise InvalidSession("Session ID must be 8-64 letters, digits, '-' or '_'")
+        self.session_id = session_id
+        self.base_dir = os.path.join(root, session_id) if session_id else ''
+        self.schedule_dir = os.path.join(self.base_dir, SCHEDULE_FOLDER)
+        self.validation_dir = os.path.join(self.base_dir, VALIDATION_FOLDER)
+
+    def ensure(self):
+        """Create the folders and mark the workspace as recently used."""
+        os.makedirs(self.schedule_dir, exist_ok=True)
+        os.makedirs(self.validation_dir, exist_ok=True)
+        if self.session_id:
+            os.utime(self.base_dir)
+        return self
+
+    def schedule_path(self, filename):
+        return os.path.join(self.schedule_dir, filename)
+
+    def validation_path(self, filename):
+        return os.path.join(self.validation_dir, filename)
+
+    def clear(self):
+        """Delete everything this workspace holds."""
+        if self.session_id:
+            shutil.rmtree(self.base_dir, ignore_errors=True)
+            return
+
+        for directory in (self.schedule_dir, self.validation_dir):
+            if not os.path.exists(directory):
+                continue
+            for filename in os.listdir(directory):
+                file_path = os.path.join(directory, filename)
+                try:
+                    if os.path.isfile(file_path):
+                        os.unlink(file_path)
+                    elif os.path.isdir(file_path):
+                        shutil.rmtree(file_path)
+                except Exception as e:
+                    print(f"Error deleting {file_path}: {e}")
+
+def remove_stale_workspaces(max_age=WORKSPACE_TTL, root=WORKSPACES_FOLDER):
+    """Delete session workspaces nobody has used for max_age seconds."""
+    if not os.path.isdir(root):
+        return
+    cutoff = time.time() - max_age
+    for session_id in os.listdir(root):
+        path = os.path.join(root, session_id)
+        if os.path.isdir(path) and os.path.getmtime(path) < cutoff:
+            shutil.rmtree(path, ignore_errors=True)
@@ -5,13 +5,15 @@ from RateMyProf import load_professors, get_professor_url, scrape_reviews
 from Summarizer import start_ollama_server, get_summary
 from difflib import get_close_matches
 
-def ensure_schedule_jsons_dir():
+SCHEDULE_DIR = os.environ.get("SCHEDULE_DIR", "Schedule Jsons")
+
+def ensure_schedule_jsons_dir(schedule_dir: str = SCHEDULE_DIR):
     """Ensure the Schedule Jsons directory exists."""
-    os.makedirs("Schedule Jsons", exist_ok=True)
+    os.makedirs(schedule_dir, exist_ok=True)
 
-def initialize_reviews_file():
+def initialize_reviews_file(schedule_dir: str = SCHEDULE_DIR):
     """Clear and initialize the reviews file with an empty structure."""
-    reviews_file = os.path.join("Schedule Jsons", "Reviews.json")
+    reviews_file = os.path.join(schedule_dir, "Reviews.json")
     initial_data = {
         "professors": {}  # Will store professor reviews as: "prof_name": {"reviews": [...]}
     }
@@ -19,9 +21,9 @@ def initialize_reviews_file():
         json.dump(initial_data, f, indent=4, ensure_ascii=False)
     return reviews_file
 
-def save_professor_reviews(professor_name: str, reviews: List[str]):
+def save_professor_reviews(professor_name: str, reviews: List[str], schedule_dir: str = SCHEDULE_DIR):
     """Add or update reviews for a professor in the reviews file."""
-    reviews_file = os.path.join("Schedule Jsons", "Reviews.json")
+    reviews_file = os.path.join(schedule_dir, "Reviews.json")
     
     try:
         with open(reviews_file, 'r', encoding='utf-8') as f:
@@ -36,9 +38,9 @@ def save_professor_reviews(professor_name: str, reviews: List[str]):
     with open(reviews_file, 'w', encoding='utf-8') as f:
         json.dump(all_reviews, f, indent=4, ensure_ascii=False)
 
-def get_professor_reviews(professor_name: str) -> Optional[List[str]]:
+def get_professor_reviews(professor_name: str, schedule_dir: str = SCHEDULE_DIR) -> Optional[List[str]]:
     """Retrieve reviews for a specific professor from the reviews file."""
-    reviews_file = os.path.join("Schedule Jsons", "Reviews.json")
+    reviews_file = os.path.join(schedule_dir, "Reviews.json")
     
     try:
         with open(reviews_file, 'r', encoding='utf-8') as f:
@@ -82,8 +84,8 @@ def find_matching_professor(prof_name: str, professors_data: List[dict]) -> Opti
     
     return None
 
-def extract_professors_and_courses(schedule_file: str) -> Dict[str, Set[str]]:
-    file_path = os.path.join("Schedule Jsons", schedule_file)
+def extract_professors_and_courses(schedule_file: str, schedule_dir: str = SCHEDULE_DIR) -> Dict[str, Set[str]]:
+    file_path = os.path.join(schedule_dir, schedule_file)
     with open(file_path, 'r') as f:
         schedule_data = json.load(f)
     
@@ -105,7 +107,8 @@ def extract_professors_and_courses(schedule_file: str) -> Dict[str, Set[str]]:
     
     return professor_courses
 
-def get_professor_summary(prof_name: str, courses: Set[str], professors_data: List[dict]) -> dict:
+def get_professor_summary(prof_name: str, courses: Set[str], professors_data: List[dict],
+                          schedule_dir: str = SCHEDULE_DIR) -> dict:
     display_name = format_display_name(prof_name)
     print(f"\nProcessing professor: {display_name}")
     
@@ -137,7 +140,7 @@ def get_professor_summary(prof_name: str, courses: Set[str], professors_data: Li
         }
     
     # Save reviews for this professor
-    save_professor_reviews(matched_prof['name'], reviews)
+    save_professor_reviews(matched_prof['name'], reviews, schedule_dir)
     reviews_text = '\n'.join(reviews)
     
     print("Generating summary...")
@@ -152,21 +155,21 @@ def get_professor_summary(prof_name: str, courses: Set[str], professors_data: Li
         'review_count': len(reviews)
     }
 
-def main():
+def main(schedule_dir: str = SCHEDULE_DIR):
     print("Initializing Ollama server...")
     ollama_process = start_ollama_server()
     
     try:
-        ensure_schedule_jsons_dir()
+        ensure_schedule_jsons_dir(schedule_dir)
         
         # Initialize empty reviews file at the start
         print("Initializing reviews file...")
-        initialize_reviews_file()
+        initialize_reviews_file(schedule_dir)
         
         professors_file = os.path.join("professorURLs", "ProfessorURLs.json")
         schedule_file = "generated_schedule.json"
         
-        professor_courses = extract_professors_and_courses(schedule_file)
+        professor_courses = extract_professors_and_courses(schedule_file, schedule_dir)
         print(f"Found {len(professor_courses)} professors in schedule")
         
         try:
@@ -177,9 +180,9 @@ def main():
         
         summaries = {}
         for prof, courses in professor_courses.items():
-            summaries[prof] = get_professor_summary(prof, courses, professors_data)
+            summaries[prof] = get_professor_summary(prof, courses, professors_data, schedule_dir)
         
-        output_file = os.path.join("Schedule Jsons", "professor_summaries.json")
+        output_file = os.path.join(schedule_dir, "professor_summaries.json")
         with open(output_file, 'w', encoding='utf-8') as f:
             json.dump(summaries, f, indent=2, ensure_ascii=False)
         
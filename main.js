@@ -1,3 +1,22 @@
+// Identifies this tab's workspace on the server, so concurrent users get separate files
+const SESSION_ID = getSessionId();
+
+function getSessionId() {
+    let sessionId = sessionStorage.getItem('sessionId');
+    if (!sessionId) {
+        sessionId = window.crypto.randomUUID
+            ? window.crypto.randomUUID()
+            : Array.from(window.crypto.getRandomValues(new Uint8Array(16)),
+                         byte => byte.toString(16).padStart(2, '0')).join('');
+        sessionStorage.setItem('sessionId', sessionId);
+    }
+    return sessionId;
+}
+
+function sessionHeaders(headers = {}) {
+    return { ...headers, "X-Session-Id": SESSION_ID };
+}
+
 // Initialize all functionality
 document.addEventListener("DOMContentLoaded", async function () {
     // Check if this is the very first load of the main page
@@ -7,6 +26,7 @@ document.addEventListener("DOMContentLoaded", async function () {
         try {
             const response = await fetch("http://127.0.0.1:5000/clear-directories", {
                 method: "POST",
+                headers: sessionHeaders(),
             });
 
             if (!response.ok) {
@@ -34,6 +54,7 @@ window.addEventListener("beforeunload", async function (event) {
     try {
         const xhr = new XMLHttpRequest();
         xhr.open("POST", "http://127.0.0.1:5000/clear-directories", false);
+        xhr.setRequestHeader("X-Session-Id", SESSION_ID);
         xhr.send();
     } catch (error) {
         console.error("Error clearing directories on refresh:", error);
@@ -58,6 +79,7 @@ function initializeDownloadButton() {
         try {
             const convertResponse = await fetch("http://127.0.0.1:5000/convert-calendar", {
                 method: "GET",
+                headers: sessionHeaders(),
             });
 
             if (!convertResponse.ok) {
@@ -85,7 +107,9 @@ function initializeDownloadButton() {
 
 async function fetchValidationErrors() {
     try {
-        const response = await fetch("http://127.0.0.1:5000/get-validation");
+        const response = await fetch("http://127.0.0.1:5000/get-validation", {
+            headers: sessionHeaders(),
+        });
 
         if (!response.ok) {
             if (response.status === 404) {
@@ -172,6 +196,39 @@ function initializeCourseManagement() {
     submitButton.addEventListener("click", handleSubmit);
 }
 
+// Follow a /courses job over its event stream until it finishes
+function waitForJob(job) {
+    return new Promise((resolve, reject) => {
+        const events = new EventSource(`http://127.0.0.1:5000${job.events_url}`);
+
+        events.addEventListener("stage", (event) => {
+            const stage = JSON.parse(event.data);
+            console.log(`Stage ${stage.stage} ${stage.status}`);
+        });
+
+        // Show each better schedule as the search finds it, then the final one
+        const showSchedule = (event) => populateTable(JSON.parse(event.data).schedule);
+        events.addEventListener("incumbent", showSchedule);
+        events.addEventListener("optimal", showSchedule);
+        events.addEventListener("budget_exhausted", showSchedule);
+
+        events.addEventListener("done", (event) => {
+            events.close();
+            const result = JSON.parse(event.data);
+            if (result.status === "succeeded") {
+                resolve(result.result);
+            } else {
+                reject(new Error(result.error || "Failed to process courses"));
+            }
+        });
+
+        events.onerror = () => {
+            events.close();
+            reject(new Error("Lost connection while processing courses"));
+        };
+    });
+}
+
 async function handleSubmit(event) {
     event.preventDefault();
 
@@ -204,9 +261,9 @@ async function handleSubmit(event) {
     try {
         const restrictionsResponse = await fetch("http://127.0.0.1:5000/restrictions", {
             method: "POST",
-            headers: {
+            headers: sessionHeaders({
                 "Content-Type": "application/json"
-            },
+            }),
             body: JSON.stringify(timeRestrictions)
         });
 
@@ -216,9 +273,9 @@ async function handleSubmit(event) {
 
         const coursesResponse = await fetch("http://127.0.0.1:5000/courses", {
             method: "POST",
-            headers: {
+            headers: sessionHeaders({
                 "Content-Type": "application/json"
-            },
+            }),
             body: JSON.stringify({ courses: courses })
         });
 
@@ -227,7 +284,8 @@ async function handleSubmit(event) {
             throw new Error(errorData.error || "Failed to process courses");
         }
 
-        const data = await coursesResponse.json();
+        const job = await coursesResponse.json();
+        const data = await waitForJob(job);
 
         if (data.success) {
             setTimeout(() => {
@@ -297,7 +355,7 @@ function initializeScroll() {
 
 function initializeTables() {
     // Load schedule table
-    fetch("http://127.0.0.1:5000/get-schedule/generated_schedule.json")
+    fetch("http://127.0.0.1:5000/get-schedule/generated_schedule.json", { headers: sessionHeaders() })
         .then(response => {
             if (!response.ok) {
                 throw new Error(`Failed to load schedule (Status: ${response.status})`);
@@ -316,7 +374,7 @@ function initializeTables() {
         });
 
     // Load professor summary table
-    fetch("http://127.0.0.1:5000/get-schedule/professor_summaries.json")
+    fetch("http://127.0.0.1:5000/get-schedule/professor_summaries.json", { headers: sessionHeaders() })
         .then(response => {
             if (!response.ok) {
                 throw new Error(`Failed to load professor summaries (Status: ${response.status})`);
@@ -1,6 +1,6 @@
-from itertools import product
 from datetime import datetime, timedelta
 import os
+from SessionModel import Session, convert_time_to_minutes, load_course_sessions, session_occupancy_mask
 
 # Ensure the "Schedule Jsons" directory exists
 SCHEDULE_DIR = "Schedule Jsons"
@@ -21,15 +21,7 @@ def parse_time(time_str):
 
 def check_time_conflict(slot1, slot2):
     """Check if two time slots conflict"""
-    start1 = parse_time(slot1['beginTime'])
-    end1 = parse_time(slot1['endTime'])
-    start2 = parse_time(slot2['beginTime'])
-    end2 = parse_time(slot2['endTime'])
-    
-    if not set(slot1['daysOfWeek']).intersection(set(slot2['daysOfWeek'])):
-        return False
-    
-    return not (end1 <= start2 or end2 <= start1)
+    return (session_occupancy_mask(slot1) & session_occupancy_mask(slot2)) != 0
 
 def is_within_time_preferences(section, time_preferences):
     """Check if a section falls within the preferred time ranges"""
@@ -49,85 +41,89 @@ def is_within_time_preferences(section, time_preferences):
     return True
 
 def get_required_meeting_types(course_sections):
-    """Get all meeting types required for a course"""
-    return set(section['meetingScheduleType'] for section in course_sections)
+    """Get all meeting types required for a course, in order of first appearance"""
+    return list(dict.fromkeys(section['meetingScheduleType'] for section in course_sections))
 
-def find_best_schedule(courses_data, time_preferences=None):
+def iter_conflict_free_schedules(slots, stats=None):
     """
-    Find the best possible schedule that includes one of each required meeting type per course
-    and fits within the specified time preferences
+    Lazily yield every conflict-free schedule that takes one section from each
+    slot, as a list of sections, in the same order itertools.product would.
+    slots is a list of lists of (section, compiled Session) pairs. Sections
+    are added depth-first against a running occupancy mask, so a conflicting
+    prefix is dropped with everything that would extend it, and only the
+    current path is held in memory.
+    stats, if given, is a dict whose 'nodes' and 'schedules' counts are
+    incremented.
     """
-    if time_preferences is None:
-        time_preferences = []
+    chosen = []
+    
+    def extend(slot_index, occupied):
+        if stats is not None:
+            stats['nodes'] = stats.get('nodes', 0) + 1
+        if slot_index == len(slots):
+            if stats is not None:
+                stats['schedules'] = stats.get('schedules', 0) + 1
+            yield list(chosen)
+            return
+        
+        for section, compiled in slots[slot_index]:
+            if compiled.occupancy & occupied:
+                continue
+            chosen.append(section)
+            yield from extend(slot_index + 1, occupied | compiled.occupancy)
+            chosen.pop()
     
-    # Group sections by meeting type for each course
-    course_sections_by_type = {}
+    return extend(0, 0)
+
+def build_schedule_slots(courses_data, time_preferences=None):
+    """
+    One slot per (course, required meeting type), holding the sections that
+    fit the time preferences alongside their compiled Session, ready for
+    iter_conflict_free_schedules. Courses missing a required type are skipped.
+    """
+    slots = []
     for course_code, sections in courses_data.items():
-        course_sections_by_type[course_code] = {}
+        sections_by_type = {}
         for section in sections:
             # Skip sections that don't fit time preferences
             if time_preferences and not is_within_time_preferences(section, time_preferences):
                 continue
-                
-            meeting_type = section['meetingScheduleType']
-            if meeting_type not in course_sections_by_type[course_code]:
-                course_sections_by_type[course_code][meeting_type] = []
-            course_sections_by_type[course_code][meeting_type].append(section)
-    
-    # Generate all possible combinations of sections for each course
-    course_combinations = {}
-    for course_code, sections_by_type in course_sections_by_type.items():
-        required_types = get_required_meeting_types(courses_data[course_code])
-        type_combinations = []
+            
+            compiled = section if isinstance(section, Session) else Session(section)
+            sections_by_type.setdefault(section['meetingScheduleType'], []).append((section, compiled))
         
-        sections_by_required_type = [sections_by_type.get(req_type, []) for req_type in required_types]
+        required_types = get_required_meeting_types(sections)
+        course_slots = [sections_by_type.get(req_type, []) for req_type in required_types]
         
         # Check if any required type has no valid sections
-        if any(not sections for sections in sections_by_required_type):
+        if any(not course_slot for course_slot in course_slots):
             print(f"Warning: No valid sections found for some required types in {course_code}")
             continue
         
-        for combination in product(*sections_by_required_type):
-            has_conflict = False
-            for i in range(len(combination)):
-                for j in range(i + 1, len(combination)):
-                    if check_time_conflict(combination[i], combination[j]):
-                        has_conflict = True
-                        break
-                if has_conflict:
-                    break
-            
-            if not has_conflict:
-                type_combinations.append(combination)
-        
-        course_combinations[course_code] = type_combinations
+        slots.extend(course_slots)
+    
+    return slots
+
+def find_best_schedule(courses_data, time_preferences=None, stats=None):
+    """
+    Find the best possible schedule that includes one of each required meeting type per course
+    and fits within the specified time preferences
+    """
+    if time_preferences is None:
+        time_preferences = []
     
-    # Check if any course has no valid combinations
-    if not all(course_combinations.values()):
-        return None
+    slots = build_schedule_slots(courses_data, time_preferences)
     
-    # Generate all possible schedule combinations
+    # Stream the conflict-free schedules, keeping only the best one
     best_schedule = None
     min_gaps = float('inf')
     
-    for schedule_combination in product(*course_combinations.values()):
-        schedule = [section for course_sections in schedule_combination for section in course_sections]
-        
-        has_conflict = False
-        for i in range(len(schedule)):
-            for j in range(i + 1, len(schedule)):
-                if check_time_conflict(schedule[i], schedule[j]):
-                    has_conflict = True
-                    break
-            if has_conflict:
-                break
+    for schedule in iter_conflict_free_schedules(slots, stats):
+        total_gaps = calculate_schedule_gaps(schedule)
         
-        if not has_conflict:
-            total_gaps = calculate_schedule_gaps(schedule)
-            
-            if total_gaps < min_gaps:
-                min_gaps = total_gaps
-                best_schedule = schedule
+        if total_gaps < min_gaps:
+            min_gaps = total_gaps
+            best_schedule = schedule
     
     return best_schedule
 
@@ -143,12 +139,12 @@ def calculate_schedule_gaps(schedule):
             classes_by_day[day].append(section)
     
     for day, classes in classes_by_day.items():
-        sorted_classes = sorted(classes, key=lambda x: parse_time(x['beginTime']))
+        sorted_classes = sorted(classes, key=lambda x: convert_time_to_minutes(x['beginTime']))
         
         for i in range(len(sorted_classes) - 1):
-            current_end = parse_time(sorted_classes[i]['endTime'])
-            next_start = parse_time(sorted_classes[i + 1]['beginTime'])
-            gap = (next_start - current_end).seconds / 60
+            current_end = convert_time_to_minutes(sorted_classes[i]['endTime'])
+            next_start = convert_time_to_minutes(sorted_classes[i + 1]['beginTime'])
+            gap = next_start - current_end
             if gap > 20:  # Only count gaps longer than 20 minutes
                 total_gaps += gap
     
@@ -227,8 +223,7 @@ if __name__ == "__main__":
     import json
     
     # Load course data
-    with open(get_file_path('combined_courses.json'), 'r') as file:
-        courses_data = json.load(file)
+    courses_data = load_course_sessions(get_file_path('combined_courses.json'))
     
     # Example time preferences
     time_preferences = [